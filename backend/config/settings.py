@@ -54,6 +54,7 @@ class Settings(BaseSettings):
     # Per-program rate limits
     united_requests_per_minute: int = Field(default=6, description="United rate limit")
     aeroplan_requests_per_minute: int = Field(default=6, description="Aeroplan rate limit")
+    jetblue_requests_per_minute: int = Field(default=30, description="JetBlue rate limit")
     
     # Human-like behavior settings
     human_delay_min_ms: int = Field(default=300, description="Min delay for human actions (ms)")
@@ -85,6 +86,10 @@ class Settings(BaseSettings):
     max_results_per_search: int = Field(default=500, description="Maximum results per search")
     cache_first: bool = Field(default=True, description="Return cached data if available")
     fallback_to_demo: bool = Field(default=True, description="Fallback to demo on scrape failure")
+    jetblue_cache_ttl_secs: int = Field(default=600, description="Reuse identical JetBlue search results for this long")
+    jetblue_keep_html: bool = Field(default=False, description="Keep an HTML snippet of each JetBlue flight card in raw_data")
+    lufthansa_fast_parse: bool = Field(default=False, description="Parse Lufthansa result cards with regexes before building an HTML tree")
+    lufthansa_keep_html: bool = Field(default=False, description="Keep an HTML snippet of each Lufthansa flight card in raw_data")
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -107,6 +112,8 @@ class Settings(BaseSettings):
             "united": self.united_requests_per_minute,
             "united_mileageplus": self.united_requests_per_minute,
             "aeroplan": self.aeroplan_requests_per_minute,
+            "jetblue": self.jetblue_requests_per_minute,
+            "jetblue_trueblue": self.jetblue_requests_per_minute,
         }
         return limits.get(program.lower(), self.max_requests_per_minute)
     
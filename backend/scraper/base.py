@@ -2,13 +2,15 @@
 Base Scraper - Abstract base class with rate limiting, retries, and human-like behavior
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, Callable, Tuple
+from collections import OrderedDict, deque
+from typing import List, Optional, Dict, Any, Callable, Tuple, Deque
 from datetime import date, datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import wraps
 import asyncio
 import random
+import threading
 import time
 import hashlib
 
@@ -62,7 +64,7 @@ class ScrapeResult:
     duration_ms: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class FlightAvailability:
     """Normalized flight availability data model"""
     # Identifiers
@@ -142,9 +144,14 @@ class RateLimiter:
     
     def __init__(self, requests_per_minute: int = 10):
         self.requests_per_minute = requests_per_minute
-        self._requests: List[datetime] = []
-        self._lock = asyncio.Lock()
-        self._backoff_until: Optional[datetime] = None
+        # Request and backoff times are time.monotonic() seconds; _requests
+        # may hold reserved times slightly in the future
+        self._requests: Deque[float] = deque()
+        # Limiters are process-global and scrapers run on per-request event
+        # loops in worker threads, so slots are reserved under a thread lock
+        # and the wait happens on the caller's own loop, outside the lock
+        self._lock = threading.Lock()
+        self._backoff_until: Optional[float] = None
         self._consecutive_errors = 0
     
     async def acquire(self) -> bool:
@@ -154,30 +161,38 @@ class RateLimiter:
         Returns:
             True if request allowed, False if should wait
         """
-        async with self._lock:
-            now = datetime.utcnow()
+        wait_secs = self._reserve_slot() - time.monotonic()
+        if wait_secs > 0:
+            logger.debug(f"Rate limit reached, waiting {wait_secs:.1f}s")
+            await asyncio.sleep(wait_secs)
+        return True
+    
+    def _reserve_slot(self) -> float:
+        """Record the earliest time a new request fits the limits and return it"""
+        with self._lock:
+            now = time.monotonic()
             
-            # Check backoff
-            if self._backoff_until and now < self._backoff_until:
-                wait_secs = (self._backoff_until - now).total_seconds()
-                logger.debug(f"Rate limiter in backoff for {wait_secs:.1f}s")
-                await asyncio.sleep(wait_secs)
+            # Drop requests that have left the one-minute window
+            window_start = now - 60
+            while self._requests and self._requests[0] <= window_start:
+                self._requests.popleft()
             
-            # Clean old requests outside the window
-            window_start = now - timedelta(minutes=1)
-            self._requests = [r for r in self._requests if r > window_start]
+            slot = now
+            
+            # Check backoff
+            if self._backoff_until and slot < self._backoff_until:
+                logger.debug(f"Rate limiter in backoff for {self._backoff_until - now:.1f}s")
+                slot = self._backoff_until
             
-            # Check if at limit
-            if len(self._requests) >= self.requests_per_minute:
-                oldest = self._requests[0]
-                wait_secs = (oldest + timedelta(minutes=1) - now).total_seconds()
-                if wait_secs > 0:
-                    logger.debug(f"Rate limit reached, waiting {wait_secs:.1f}s")
-                    await asyncio.sleep(wait_secs)
+            # Check if at limit; reservations stay in order
+            if self._requests:
+                slot = max(slot, self._requests[-1])
+                if len(self._requests) >= self.requests_per_minute:
+                    slot = max(slot, self._requests[-self.requests_per_minute] + 60)
             
             # Record request
-            self._requests.append(now)
-            return True
+            self._requests.append(slot)
+            return slot
     
     def record_success(self) -> None:
         """Record a successful request"""
@@ -205,7 +220,7 @@ class RateLimiter:
         elif error_type == "blocked":
             delay *= 3
         
-        self._backoff_until = datetime.utcnow() + timedelta(seconds=delay)
+        self._backoff_until = time.monotonic() + delay
         logger.warning(f"Rate limiter backoff: {delay:.1f}s (errors: {self._consecutive_errors})")
     
     @property
@@ -213,7 +228,48 @@ class RateLimiter:
         """Check if currently in backoff period"""
         if self._backoff_until is None:
             return False
-        return datetime.utcnow() < self._backoff_until
+        return time.monotonic() < self._backoff_until
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of search results with per-entry expiry.
+    
+    Scrapers run concurrently on the API's worker threads, so every read
+    and write happens under a thread lock.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # Entries map key -> (time.monotonic() expiry, results)
+        self._entries: "OrderedDict[tuple, Tuple[float, List[FlightAvailability]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: tuple) -> Optional[List[FlightAvailability]]:
+        """Return a copy of unexpired results for key, if any"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return list(entry[1])
+    
+    def put(self, key: tuple, results: List[FlightAvailability], ttl_secs: float) -> None:
+        """Store results for key for ttl_secs, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_secs, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
 
 
 # Global rate limiters per program
@@ -240,12 +296,15 @@ class BaseScraper(ABC):
     - Proxy and session management
     """
     
+    # Default number of concurrent searches in search_availability_batch
+    BATCH_CONCURRENCY = 5
+    
     def __init__(self, browser_manager=None, proxy_rotator=None, useragent_rotator=None):
         self.browser_manager = browser_manager
         self.proxy_rotator = proxy_rotator
         self.useragent_rotator = useragent_rotator
         self._session_cookies: Dict[str, str] = {}
-        self._last_request_time: Optional[datetime] = None
+        self._last_request_time: Optional[float] = None  # time.monotonic()
         self._rate_limiter: Optional[RateLimiter] = None
         self._current_proxy_id: Optional[str] = None
     
@@ -593,7 +652,47 @@ class BaseScraper(ABC):
             await self._rate_limit_delay()
         
         return results
-    
+
+    async def search_availability_batch(
+        self,
+        queries: List[Tuple[str, str, date, Optional[CabinClass]]],
+        max_concurrency: Optional[int] = None
+    ) -> List[List[FlightAvailability]]:
+        """
+        Search several (origin, destination, departure_date, cabin_class)
+        queries concurrently, at most max_concurrency (default
+        BATCH_CONCURRENCY) at a time.
+
+        Returns one result list per query, in order; failed queries are
+        logged and yield an empty list.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.BATCH_CONCURRENCY)
+
+        async def _search_one(query):
+            origin, destination, departure_date, cabin_class = query
+            async with semaphore:
+                return await self.search_availability(
+                    origin=origin,
+                    destination=destination,
+                    departure_date=departure_date,
+                    cabin_class=cabin_class
+                )
+
+        results = await asyncio.gather(
+            *(_search_one(query) for query in queries),
+            return_exceptions=True
+        )
+
+        batch_results = []
+        for query, result in zip(queries, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error searching {query[0]}-{query[1]} on {query[2]}: {result}")
+                batch_results.append([])
+            else:
+                batch_results.append(result)
+
+        return batch_results
+
     async def health_check(self) -> bool:
         """Verify scraper can connect to the website"""
         try:
@@ -606,7 +705,7 @@ class BaseScraper(ABC):
     async def _rate_limit_delay(self) -> None:
         """Apply rate limiting delay"""
         if self._last_request_time:
-            elapsed = (datetime.utcnow() - self._last_request_time).total_seconds()
+            elapsed = time.monotonic() - self._last_request_time
             min_delay = settings.scrape_delay_min
             max_delay = settings.scrape_delay_max
             
@@ -616,7 +715,7 @@ class BaseScraper(ABC):
                 sleep_time = target_delay - elapsed
                 await asyncio.sleep(sleep_time)
         
-        self._last_request_time = datetime.utcnow()
+        self._last_request_time = time.monotonic()
     
     def _generate_flight_id(self, flight_number: str, departure_date: date, cabin: str) -> str:
         """Generate unique ID for a flight"""
@@ -78,6 +78,8 @@ class BrowserProfile:
     locale: str
     proxy: Optional[ProxyConfig] = None
     headless: bool = True
+    # Record CDP network events so responses can be read back via the driver
+    performance_logging: bool = False
     
     @classmethod
     def create_for_program(cls, program: str, user_agent: str = None, proxy: ProxyConfig = None) -> "BrowserProfile":
@@ -160,6 +162,10 @@ class BrowserManager:
             proxy_arg = self.profile.proxy.to_selenium_arg()
             options.add_argument(f"--proxy-server={proxy_arg}")
         
+        # Performance log (CDP Network.* events) for response capture
+        if self.profile.performance_logging:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
         return options
     
     def create_driver(self) -> Any:
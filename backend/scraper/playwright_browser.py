@@ -59,6 +59,9 @@ class StealthConfig:
     
     # User agent (None = use stealth default)
     user_agent: Optional[str] = None
+    
+    # Saved cookies/localStorage file to preload into new contexts
+    storage_state: Optional[str] = None
 
 
 class HumanBehavior:
@@ -433,6 +436,7 @@ class AsyncPlaywrightStealthBrowser:
             locale=self.config.locale,
             timezone_id=self.config.timezone,
             user_agent=self.config.user_agent,
+            storage_state=self.config.storage_state,
         )
         
         return self
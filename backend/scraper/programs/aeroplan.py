@@ -3,10 +3,12 @@ Aeroplan Scraper - Enhanced with resilient locators and human-like behavior
 """
 from datetime import date, datetime
 from typing import List, Optional, Dict, Any, Tuple
+import asyncio
 import hashlib
 import re
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml.cssselect import CSSSelector
 from loguru import logger
 
 from scraper.base import (
@@ -29,6 +31,60 @@ except ImportError:
     HAS_SELENIUM = False
 
 
+# Time patterns, tried in order: "14:05" then "1405"
+_TIME_PATTERNS = (
+    re.compile(r"(\d{1,2}):(\d{2})"),
+    re.compile(r"(\d{1,2})(\d{2})"),
+)
+
+
+def _compile_selectors(*selectors: str) -> Tuple[Tuple[str, CSSSelector], ...]:
+    """Compile CSS selectors once, keeping the source string for logging"""
+    return tuple((s, CSSSelector(s, translator="html")) for s in selectors)
+
+
+# Flight card selectors, tried in order until one matches
+_FLIGHT_CARD_SELECTORS = _compile_selectors(
+    "[data-testid='flight-card']",
+    ".flight-option",
+    "[class*='FlightCard']",
+    ".flight-row",
+    "[class*='flightOption']",
+    ".available-flight",
+)
+
+# Per-card field selectors
+_FLIGHT_NUM_SELECTORS = _compile_selectors(
+    "[data-testid='flight-number']",
+    ".flight-number",
+    "[class*='flightNumber']",
+    ".carrier-info",
+)
+_DEP_TIME_SELECTORS = _compile_selectors(
+    "[data-testid='departure-time']",
+    ".departure-time",
+    "[class*='departTime']",
+    ".depart",
+)
+_ARR_TIME_SELECTORS = _compile_selectors(
+    "[data-testid='arrival-time']",
+    ".arrival-time",
+    "[class*='arrivalTime']",
+    ".arrive",
+)
+_POINTS_SELECTORS = _compile_selectors(
+    "[data-testid='points-cost']",
+    ".points-cost",
+    "[class*='points']",
+    ".miles",
+)
+_CABIN_SELECTORS = _compile_selectors(
+    "[data-testid='cabin-class']",
+    ".cabin-class",
+    "[class*='cabin']",
+)
+
+
 class AeroplanScraper(BaseScraper):
     """
     Scraper for Air Canada Aeroplan award availability.
@@ -64,6 +120,14 @@ class AeroplanScraper(BaseScraper):
         CabinClass.FIRST: "first",
     }
     
+    # Cabin keywords checked in priority order against lowercased card text
+    _CABIN_KEYWORDS = (
+        ("first", CabinClass.FIRST),
+        ("signature", CabinClass.FIRST),
+        ("business", CabinClass.BUSINESS),
+        ("premium", CabinClass.PREMIUM_ECONOMY),
+    )
+    
     # ============== Resilient Locators ==============
     
     def _get_origin_input_locators(self) -> List[Tuple[Any, str]]:
@@ -239,9 +303,11 @@ class AeroplanScraper(BaseScraper):
                 if browser.detect_captcha():
                     raise CaptchaError("CAPTCHA detected after search")
                 
-                # Parse results
+                # Parse results off the event loop so concurrent scrapers keep running
                 html = browser.get_page_source()
-                return self._parse_html_response(html, origin, destination, departure_date)
+                return await asyncio.to_thread(
+                    self._parse_html_response, html, origin, destination, departure_date
+                )
                 
         except (CaptchaError, BlockedError):
             raise
@@ -276,23 +342,19 @@ class AeroplanScraper(BaseScraper):
     ) -> List[FlightAvailability]:
         """Parse HTML response from browser"""
         flights = []
-        soup = BeautifulSoup(html, "lxml")
+        if not html:
+            return flights
         
-        # Try multiple selectors for flight cards
-        flight_card_selectors = [
-            "[data-testid='flight-card']",
-            ".flight-option",
-            "[class*='FlightCard']",
-            ".flight-row",
-            "[class*='flightOption']",
-            ".available-flight",
-        ]
+        root = lxml.html.fromstring(html)
+        origin = origin.upper()
+        destination = destination.upper()
         
+        # Try multiple selectors for flight cards
         flight_cards = []
-        for selector in flight_card_selectors:
-            flight_cards = soup.select(selector)
+        for selector_str, selector in _FLIGHT_CARD_SELECTORS:
+            flight_cards = selector(root)
             if flight_cards:
-                logger.debug(f"Found {len(flight_cards)} flight cards with {selector}")
+                logger.debug(f"Found {len(flight_cards)} flight cards with {selector_str}")
                 break
         
         for card in flight_cards:
@@ -314,100 +376,60 @@ class AeroplanScraper(BaseScraper):
         destination: str,
         departure_date: date
     ) -> Optional[FlightAvailability]:
-        """Parse a single flight card"""
-        try:
-            # Extract flight number
-            flight_num_selectors = [
-                "[data-testid='flight-number']",
-                ".flight-number",
-                "[class*='flightNumber']",
-                ".carrier-info",
-            ]
-            flight_number = self._extract_text(card, flight_num_selectors) or "AC"
-            
-            # Extract times
-            dep_time_selectors = [
-                "[data-testid='departure-time']",
-                ".departure-time",
-                "[class*='departTime']",
-                ".depart",
-            ]
-            arr_time_selectors = [
-                "[data-testid='arrival-time']",
-                ".arrival-time",
-                "[class*='arrivalTime']",
-                ".arrive",
-            ]
-            
-            dep_time = self._extract_text(card, dep_time_selectors) or "00:00"
-            arr_time = self._extract_text(card, arr_time_selectors) or "00:00"
-            
-            # Extract points
-            points_selectors = [
-                "[data-testid='points-cost']",
-                ".points-cost",
-                "[class*='points']",
-                ".miles",
-            ]
-            points_text = self._extract_text(card, points_selectors) or "0"
-            points = self._parse_points(points_text)
-            
-            # Extract cabin
-            cabin_selectors = [
-                "[data-testid='cabin-class']",
-                ".cabin-class",
-                "[class*='cabin']",
-            ]
-            cabin_text = self._extract_text(card, cabin_selectors) or "economy"
-            cabin = self._map_cabin_class(cabin_text)
-            
-            # Generate ID
-            flight_id = self._generate_flight_id(flight_number, departure_date, cabin.value)
-            
-            return FlightAvailability(
-                id=flight_id,
-                source_program=self.program_name,
-                origin=origin.upper(),
-                destination=destination.upper(),
-                airline="Air Canada",
-                flight_number=flight_number,
-                departure_date=departure_date,
-                departure_time=self._normalize_time(dep_time),
-                arrival_time=self._normalize_time(arr_time),
-                duration_minutes=0,
-                cabin_class=cabin,
-                points_required=points,
-                taxes_fees=0,
-                seats_available=0,
-                stops=0,
-            )
-            
-        except Exception as e:
-            logger.debug(f"Error parsing flight card: {e}")
-            return None
+        """Parse a single flight card (lxml element)"""
+        # Extract flight number
+        flight_number = self._extract_text(card, _FLIGHT_NUM_SELECTORS) or "AC"
+        
+        # Extract times
+        dep_time = self._extract_text(card, _DEP_TIME_SELECTORS) or "00:00"
+        arr_time = self._extract_text(card, _ARR_TIME_SELECTORS) or "00:00"
+        
+        # Extract points
+        points_text = self._extract_text(card, _POINTS_SELECTORS) or "0"
+        points = self._parse_points(points_text)
+        
+        # Extract cabin
+        cabin_text = self._extract_text(card, _CABIN_SELECTORS) or "economy"
+        cabin = self._map_cabin_class(cabin_text)
+        
+        # Generate ID
+        flight_id = self._generate_flight_id(flight_number, departure_date, cabin.value)
+        
+        return FlightAvailability(
+            id=flight_id,
+            source_program=self.program_name,
+            origin=origin,
+            destination=destination,
+            airline="Air Canada",
+            flight_number=flight_number,
+            departure_date=departure_date,
+            departure_time=self._normalize_time(dep_time),
+            arrival_time=self._normalize_time(arr_time),
+            duration_minutes=0,
+            cabin_class=cabin,
+            points_required=points,
+            taxes_fees=0,
+            seats_available=0,
+            stops=0,
+        )
     
     # ============== Helper Methods ==============
     
-    def _extract_text(self, element, selectors: List[str]) -> Optional[str]:
+    def _extract_text(self, element, selectors: Tuple[Tuple[str, CSSSelector], ...]) -> Optional[str]:
         """Extract text using multiple fallback selectors"""
-        for selector in selectors:
-            try:
-                found = element.select_one(selector)
-                if found:
-                    return found.get_text(strip=True)
-            except Exception:
-                continue
+        for _, selector in selectors:
+            found = selector(element)
+            if found:
+                # Same joining as bs4's get_text(strip=True)
+                return "".join(t.strip() for t in found[0].itertext())
         return None
     
     def _map_cabin_class(self, cabin_str: str) -> CabinClass:
         """Map cabin string to CabinClass enum"""
         cabin_lower = cabin_str.lower()
-        if "first" in cabin_lower or "signature" in cabin_lower:
-            return CabinClass.FIRST
-        elif "business" in cabin_lower:
-            return CabinClass.BUSINESS
-        elif "premium" in cabin_lower:
-            return CabinClass.PREMIUM_ECONOMY
+        for keyword, cabin in self._CABIN_KEYWORDS:
+            if keyword in cabin_lower:
+                return cabin
         return CabinClass.ECONOMY
     
     def _normalize_time(self, time_str: str) -> str:
@@ -415,13 +437,8 @@ class AeroplanScraper(BaseScraper):
         try:
             time_str = time_str.upper().replace("AM", "").replace("PM", "").strip()
             
-            patterns = [
-                r"(\d{1,2}):(\d{2})",
-                r"(\d{1,2})(\d{2})",
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, time_str)
+            for pattern in _TIME_PATTERNS:
+                match = pattern.search(time_str)
                 if match:
                     hour, minute = match.groups()
                     return f"{int(hour):02d}:{minute}"
@@ -433,7 +450,8 @@ class AeroplanScraper(BaseScraper):
     def _parse_points(self, points_text: str) -> int:
         """Parse points from text"""
         try:
-            cleaned = re.sub(r"[^\d]", "", points_text)
+            # Keep only digits; isdecimal matches what regex \d would keep
+            cleaned = "".join(filter(str.isdecimal, points_text))
             if cleaned:
                 points = int(cleaned)
                 if "k" in points_text.lower() and points < 1000:
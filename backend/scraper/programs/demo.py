@@ -2,7 +2,7 @@
 Demo Scraper - Returns mock data for testing the application
 """
 import random
-import hashlib
+import secrets
 from datetime import date, datetime, timedelta
 from typing import List, Optional
 from loguru import logger
@@ -74,6 +74,19 @@ class DemoScraper(BaseScraper):
         CabinClass.FIRST: (300, 1200),
     }
     
+    # Seats available (1-9, weighted toward lower numbers)
+    SEAT_COUNTS = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    SEAT_WEIGHTS = [25, 20, 15, 12, 10, 8, 5, 3, 2]
+    
+    # Stops (0-2, weighted toward direct)
+    STOP_COUNTS = [0, 1, 2]
+    STOP_WEIGHTS = [50, 35, 15]
+    
+    # Departure hours (6-22), flight durations (2-16 hours) and quarter-hour minutes
+    DEPARTURE_HOURS = range(6, 23)
+    DURATION_HOURS = range(2, 17)
+    QUARTER_HOURS = [0, 15, 30, 45]
+    
     async def search_availability(
         self,
         origin: str,
@@ -98,58 +111,62 @@ class DemoScraper(BaseScraper):
         else:
             cabins_to_generate = list(CabinClass)
         
-        for _ in range(num_flights):
-            cabin = random.choice(cabins_to_generate)
-            airline_name, airline_code = random.choice(self.AIRLINES)
-            
+        # Draw the per-flight random values in batches rather than per flight
+        cabins = random.choices(cabins_to_generate, k=num_flights)
+        airlines = random.choices(self.AIRLINES, k=num_flights)
+        dep_hours = random.choices(self.DEPARTURE_HOURS, k=num_flights)
+        dep_minutes = random.choices(self.QUARTER_HOURS, k=num_flights)
+        dur_hours = random.choices(self.DURATION_HOURS, k=num_flights)
+        dur_minutes = random.choices(self.QUARTER_HOURS, k=num_flights)
+        seat_counts = random.choices(self.SEAT_COUNTS, weights=self.SEAT_WEIGHTS, k=num_flights)
+        stop_counts = random.choices(self.STOP_COUNTS, weights=self.STOP_WEIGHTS, k=num_flights)
+        
+        # Values shared by every flight in this search
+        program_name = self.program_name
+        origin = origin.upper()
+        destination = destination.upper()
+        mileage_ranges = self.MILEAGE_RANGES
+        tax_ranges = self.TAX_RANGES
+        dep_year, dep_month, dep_day = departure_date.year, departure_date.month, departure_date.day
+        
+        for (
+            cabin, (airline_name, airline_code), hour, minute,
+            duration_hours, duration_minutes, seats, stops,
+        ) in zip(
+            cabins, airlines, dep_hours, dep_minutes,
+            dur_hours, dur_minutes, seat_counts, stop_counts,
+        ):
             # Generate flight number
             flight_number = f"{airline_code}{random.randint(100, 9999)}"
             
             # Generate departure time
-            hour = random.randint(6, 22)
-            minute = random.choice([0, 15, 30, 45])
-            dep_time = datetime.combine(departure_date, datetime.min.time()).replace(
-                hour=hour, minute=minute
-            )
+            dep_time = datetime(dep_year, dep_month, dep_day, hour, minute)
             
-            # Generate flight duration (2-16 hours depending on route)
-            duration_hours = random.randint(2, 16)
-            duration_minutes = random.choice([0, 15, 30, 45])
+            # Generate arrival time from flight duration
             arr_time = dep_time + timedelta(hours=duration_hours, minutes=duration_minutes)
             
             # Generate mileage cost
-            min_miles, max_miles = self.MILEAGE_RANGES[cabin]
+            min_miles, max_miles = mileage_ranges[cabin]
             miles = random.randint(min_miles // 1000, max_miles // 1000) * 1000
             
             # Generate taxes
-            min_tax, max_tax = self.TAX_RANGES[cabin]
+            min_tax, max_tax = tax_ranges[cabin]
             taxes = round(random.uniform(min_tax, max_tax), 2)
             
-            # Generate seats available (1-9, weighted toward lower numbers)
-            seats = random.choices(
-                [1, 2, 3, 4, 5, 6, 7, 8, 9],
-                weights=[25, 20, 15, 12, 10, 8, 5, 3, 2]
-            )[0]
-            
-            # Generate stops (0-2, weighted toward direct)
-            stops = random.choices([0, 1, 2], weights=[50, 35, 15])[0]
-            
             # Generate unique ID
-            flight_id = hashlib.md5(
-                f"{origin}{destination}{departure_date}{flight_number}{cabin.value}{random.random()}".encode()
-            ).hexdigest()[:16]
+            flight_id = secrets.token_hex(8)
             
             # Create flight availability matching the dataclass schema
             flight = FlightAvailability(
                 id=flight_id,
-                source_program=self.program_name,
-                origin=origin.upper(),
-                destination=destination.upper(),
+                source_program=program_name,
+                origin=origin,
+                destination=destination,
                 airline=airline_name,
                 flight_number=flight_number,
                 departure_date=departure_date,
-                departure_time=dep_time.strftime("%H:%M"),
-                arrival_time=arr_time.strftime("%H:%M"),
+                departure_time=f"{dep_time.hour:02d}:{dep_time.minute:02d}",
+                arrival_time=f"{arr_time.hour:02d}:{arr_time.minute:02d}",
                 duration_minutes=duration_hours * 60 + duration_minutes,
                 cabin_class=cabin,
                 points_required=miles,
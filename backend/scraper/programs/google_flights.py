@@ -9,11 +9,13 @@ This scraper extracts cash fares which can be used for:
 
 Note: Google Flights shows cash prices, not points/miles.
 """
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import List, Optional, Dict, Any
+import functools
 import hashlib
 import re
 import asyncio
+from urllib.parse import quote, urlencode
 
 from loguru import logger
 
@@ -26,6 +28,104 @@ from scraper.base import (
 )
 
 
+# Departure time on its own line (e.g., "6:28 AM")
+_DEP_TIME_PATTERN = re.compile(r'^(\d{1,2}:\d{2}\s*(?:AM|PM))$', re.I)
+
+# Flight header: departure time, a dash line, then arrival time with optional
+# day offset, each on its own line (blank lines allowed between)
+_FLIGHT_HEADER_PATTERN = re.compile(
+    r'^[^\S\n]*(\d{1,2}:\d{2}\s*(?:AM|PM))[^\S\n]*\n'
+    r'\s*[–\-—][^\S\n]*\n'
+    r'\s*(\d{1,2}:\d{2}\s*(?:AM|PM))(\+\d)?[^\S\n]*$',
+    re.I | re.M
+)
+
+# Duration (e.g., "5 hr 32 min")
+_DURATION_PATTERN = re.compile(r'(\d+)\s*hr\s*(\d+)?\s*min', re.I)
+
+# Route (e.g., "SFO–JFK")
+_ROUTE_PATTERN = re.compile(r'([A-Z]{3})[–-]([A-Z]{3})')
+
+# Price on its own line (e.g., "$420")
+_PRICE_PATTERN = re.compile(r'^\$(\d{1,3}(?:,\d{3})*)$')
+
+# Airline names shown in result rows. Matched in one case-insensitive scan;
+# "Alaska" also covers the "AlaskaHawaiian" label.
+_AIRLINES = (
+    'United', 'Delta', 'American', 'JetBlue', 'Alaska', 'Southwest',
+    'Spirit', 'Frontier', 'Hawaiian', 'Air Canada', 'British Airways',
+    'Lufthansa', 'Virgin Atlantic', 'Emirates', 'Qatar', 'Singapore',
+    'Multiple airlines',
+)
+_AIRLINE_PATTERN = re.compile('|'.join(re.escape(a) for a in _AIRLINES), re.I)
+_AIRLINE_NAMES = {a.lower(): a for a in _AIRLINES}
+
+# Lower-cased airline name fragment -> IATA code, used by _get_airline_code
+_AIRLINE_CODES = {
+    'united': 'UA',
+    'delta': 'DL',
+    'american': 'AA',
+    'jetblue': 'B6',
+    'alaska': 'AS',
+    'southwest': 'WN',
+    'spirit': 'NK',
+    'frontier': 'F9',
+    'hawaiian': 'HA',
+    'air canada': 'AC',
+    'british airways': 'BA',
+    'lufthansa': 'LH',
+    'virgin': 'VS',
+    'emirates': 'EK',
+    'qatar': 'QR',
+    'singapore': 'SQ',
+}
+
+# Per-flight fields collected from the lines after the time range; once all
+# are found the detail scan stops early
+_DETAIL_FIELDS = frozenset({'airline', 'duration', 'stops', 'price'})
+
+# Stop labels in the page text, checked in order against a lower-cased line
+_STOP_TOKENS = (('nonstop', 0), ('1 stop', 1), ('2 stop', 2))
+
+# Stop count in a result row (e.g., "1 stop", "2 stops")
+_STOPS_PATTERN = re.compile(r'(\d+)\s*stop', re.I)
+
+# Extracts one dict of field texts per result row, so rows don't have to be
+# reconstructed from document.body.innerText
+_RESULT_ROWS_JS = """() => Array.from(
+    document.querySelectorAll('li[data-id], [role=listitem]')
+).map(r => ({
+    dep: r.querySelector("[aria-label*='Departure']")?.innerText,
+    arr: r.querySelector("[aria-label*='Arrival']")?.innerText,
+    dur: r.querySelector("[aria-label*='Total duration']")?.innerText,
+    price: r.querySelector("[aria-label*='US dollars']")?.innerText,
+    airline: r.querySelector("[class*='Ir0Voe']")?.innerText,
+    stops: r.querySelector("[aria-label*='stop']")?.innerText,
+}))"""
+
+# Page text that means the search was refused, with the error to raise
+_BLOCK_KEYWORDS = (
+    ('unusual traffic', "Blocked by Google"),
+    ('access denied', "Blocked by Google"),
+    ('time for an upgrade', "Google detected outdated browser"),
+)
+
+# Explore page that accepts a natural-language "q" search
+_SEARCH_URL = "https://www.google.com/travel/flights"
+
+# FlightAvailability fields that are the same for every Google Flights result;
+# Google shows economy cash fares only. Mutable fields stay per-flight.
+_FLIGHT_DEFAULTS = {
+    'cabin_class': CabinClass.ECONOMY,
+    'points_required': 0,
+    'taxes_fees': 0,
+    'seats_available': 0,
+}
+
+# Clock time with optional AM/PM, used by _parse_time
+_CLOCK_TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})\s*(AM|PM)?', re.I)
+
+
 class GoogleFlightsScraper(BaseScraper):
     """
     Scraper for Google Flights.
@@ -83,9 +183,11 @@ class GoogleFlightsScraper(BaseScraper):
         cabin_class: Optional[CabinClass],
         passengers: int
     ) -> List[FlightAvailability]:
-        """Search using Playwright with stealth browser"""
+        """Search using a Playwright stealth browser"""
         from ..playwright_browser import AsyncPlaywrightStealthBrowser
         
+        # Launched per search: a Playwright browser belongs to the event loop
+        # that started it, and the API runs each scrape on its own loop
         async with AsyncPlaywrightStealthBrowser() as browser:
             page = await browser.new_page()
             
@@ -93,27 +195,39 @@ class GoogleFlightsScraper(BaseScraper):
             search_url = self._build_search_url(origin, destination, departure_date, cabin_class)
             logger.debug(f"Google Flights URL: {search_url}")
             
-            await page.goto(search_url, wait_until='networkidle', timeout=30000)
-            
-            # Wait for results to load
-            await asyncio.sleep(5)
-            
-            # Get page content
+            # networkidle over-waits on Google's long-polling requests
+            await page.goto(search_url, wait_until='domcontentloaded', timeout=30000)
+
+            # Wait for result rows to render
+            try:
+                await page.wait_for_selector(
+                    '[role="main"] [data-flt-ve], li[data-id], div[jsname]',
+                    timeout=8000
+                )
+            except Exception as e:
+                logger.debug(f"Result selector wait timed out: {e}")
+
+            # Pull result rows as structured fields; page text is still
+            # needed for block detection and as a parsing fallback
+            rows = await page.evaluate(_RESULT_ROWS_JS)
             text = await page.evaluate('document.body.innerText')
-            
-            # Check for blocks
-            if 'unusual traffic' in text.lower() or 'access denied' in text.lower():
-                raise BlockedError("Blocked by Google")
-            
-            # Check for browser upgrade message
-            if 'time for an upgrade' in text.lower():
-                raise BlockedError("Google detected outdated browser")
-            
-            # Parse results
-            results = self._parse_results(text, origin, destination, departure_date)
-            
-            logger.info(f"Found {len(results)} flights on Google Flights")
-            return results
+        
+        # Check for blocks and the browser upgrade message
+        text_lower = text.lower()
+        for keyword, message in _BLOCK_KEYWORDS:
+            if keyword in text_lower:
+                raise BlockedError(message)
+        
+        # One timestamp for the whole result set (naive UTC, like the rest of the models)
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        
+        # Parse results, falling back to the text scan if no rows matched
+        results = self._parse_rows(rows, origin, destination, departure_date, scraped_at)
+        if not results:
+            results = self._parse_results(text, origin, destination, departure_date, scraped_at)
+        
+        logger.info(f"Found {len(results)} flights on Google Flights")
+        return results
     
     def _build_search_url(
         self,
@@ -126,122 +240,136 @@ class GoogleFlightsScraper(BaseScraper):
         
         date_str = departure_date.strftime("%Y-%m-%d")
         
-        # Cabin class mapping
-        cabin_param = "1"  # Economy
-        if cabin_class == CabinClass.PREMIUM_ECONOMY:
-            cabin_param = "2"
-        elif cabin_class == CabinClass.BUSINESS:
-            cabin_param = "3"
-        elif cabin_class == CabinClass.FIRST:
-            cabin_param = "4"
-        
-        # Simple URL format
-        url = (
-            f"https://www.google.com/travel/flights/search"
-            f"?tfs=CBwQAhoeEgp7ZGVwYXJ0dXJlfWoHCAESA3tvcn1yBwgBEgN7ZHN9"
-            f"&hl=en&gl=us&curr=USD"
+        # Use the explore page with params
+        query = urlencode(
+            {'q': f"Flights to {destination} from {origin} on {date_str}", 'curr': 'USD', 'hl': 'en'},
+            quote_via=quote
         )
         
-        # Alternative simpler approach - use the explore page with params
-        url = (
-            f"https://www.google.com/travel/flights?q=Flights%20to%20{destination}%20from%20{origin}%20on%20{date_str}"
-            f"&curr=USD&hl=en"
-        )
+        return f"{_SEARCH_URL}?{query}"
+    
+    def _parse_rows(
+        self,
+        rows: List[Dict[str, Optional[str]]],
+        origin: str,
+        destination: str,
+        departure_date: date,
+        scraped_at: datetime
+    ) -> List[FlightAvailability]:
+        """Parse structured result rows extracted by _RESULT_ROWS_JS"""
+        flights = []
+        
+        for row in rows:
+            dep = (row.get('dep') or '').strip()
+            price_match = _PRICE_PATTERN.match((row.get('price') or '').strip())
+            if not dep or not price_match:
+                continue
+            
+            flight_data = {
+                'departure_time': dep,
+                'arrival_time': (row.get('arr') or '').strip(),
+                'price': float(price_match.group(1).replace(',', '')),
+            }
+            
+            airline_match = _AIRLINE_PATTERN.search(row.get('airline') or '')
+            if airline_match:
+                flight_data['airline'] = _AIRLINE_NAMES[airline_match.group(0).lower()]
+            
+            duration_match = _DURATION_PATTERN.search(row.get('dur') or '')
+            if duration_match:
+                hours = int(duration_match.group(1))
+                mins = int(duration_match.group(2) or 0)
+                flight_data['duration'] = hours * 60 + mins
+            
+            stops_text = row.get('stops') or ''
+            if 'nonstop' in stops_text.lower():
+                flight_data['stops'] = 0
+            else:
+                stops_match = _STOPS_PATTERN.search(stops_text)
+                if stops_match:
+                    flight_data['stops'] = int(stops_match.group(1))
+            
+            flight = self._create_flight(flight_data, origin, destination, departure_date, scraped_at)
+            if flight:
+                flights.append(flight)
         
-        return url
+        return flights
     
     def _parse_results(
         self,
         text: str,
         origin: str,
         destination: str,
-        departure_date: date
+        departure_date: date,
+        scraped_at: datetime
     ) -> List[FlightAvailability]:
         """Parse Google Flights text results"""
         flights = []
         
-        # Split into lines
-        lines = text.split('\n')
-        
-        # Clean up lines - remove empty and whitespace-only
-        cleaned_lines = [line.strip() for line in lines if line.strip()]
+        # Each flight starts with a "6:28 AM" / "–" / "3:00 PM" header; its
+        # details run until the next header
+        headers = list(_FLIGHT_HEADER_PATTERN.finditer(text))
         
-        i = 0
-        while i < len(cleaned_lines):
-            line = cleaned_lines[i]
+        for index, header in enumerate(headers):
+            flight_data = {
+                'departure_time': header.group(1),
+                'arrival_time': header.group(2),
+            }
             
-            # Look for departure time pattern (e.g., "6:28 AM")
-            dep_time_match = re.match(r'^(\d{1,2}:\d{2}\s*(?:AM|PM))$', line, re.I)
+            details_end = headers[index + 1].start() if index + 1 < len(headers) else len(text)
+            detail_lines = [
+                s for s in (line.strip() for line in text[header.end():details_end].splitlines()) if s
+            ]
             
-            if dep_time_match:
-                # Found a departure time, now look for arrival time
-                # Format is: "6:28 AM" then " – " then "3:00 PM"
-                if i + 2 < len(cleaned_lines):
-                    # Check if next line is separator
-                    if cleaned_lines[i + 1] in ['–', '-', '—']:
-                        # Check for arrival time
-                        arr_time_match = re.match(r'^(\d{1,2}:\d{2}\s*(?:AM|PM))(\+\d)?$', cleaned_lines[i + 2], re.I)
-                        if arr_time_match:
-                            # Found a flight! Now parse the following lines for details
-                            flight_data = {
-                                'departure_time': dep_time_match.group(1),
-                                'arrival_time': arr_time_match.group(1),
-                            }
-                            
-                            # Look at next 10 lines for airline, duration, stops, price
-                            for j in range(i + 3, min(i + 15, len(cleaned_lines))):
-                                detail_line = cleaned_lines[j]
-                                
-                                # Stop if we hit another flight (another time)
-                                if re.match(r'^(\d{1,2}:\d{2}\s*(?:AM|PM))$', detail_line, re.I):
-                                    break
-                                
-                                # Airline detection
-                                if not flight_data.get('airline'):
-                                    airlines = ['United', 'Delta', 'American', 'JetBlue', 'Alaska', 'Southwest', 
-                                               'Spirit', 'Frontier', 'Hawaiian', 'Air Canada', 'British Airways',
-                                               'Lufthansa', 'Virgin Atlantic', 'Emirates', 'Qatar', 'Singapore',
-                                               'AlaskaHawaiian', 'Multiple airlines']
-                                    for airline in airlines:
-                                        if airline.lower() in detail_line.lower():
-                                            flight_data['airline'] = airline.replace('AlaskaHawaiian', 'Alaska')
-                                            break
-                                
-                                # Duration (e.g., "5 hr 32 min")
-                                duration_match = re.search(r'(\d+)\s*hr\s*(\d+)?\s*min', detail_line, re.I)
-                                if duration_match and not flight_data.get('duration'):
-                                    hours = int(duration_match.group(1))
-                                    mins = int(duration_match.group(2) or 0)
-                                    flight_data['duration'] = hours * 60 + mins
-                                
-                                # Route (e.g., "SFO–JFK")
-                                route_match = re.search(r'([A-Z]{3})[–-]([A-Z]{3})', detail_line)
-                                if route_match:
-                                    flight_data['route'] = f"{route_match.group(1)}-{route_match.group(2)}"
-                                
-                                # Stops
-                                if 'nonstop' in detail_line.lower():
-                                    flight_data['stops'] = 0
-                                elif '1 stop' in detail_line.lower():
-                                    flight_data['stops'] = 1
-                                elif '2 stop' in detail_line.lower():
-                                    flight_data['stops'] = 2
-                                
-                                # Price (e.g., "$420")
-                                price_match = re.match(r'^\$(\d{1,3}(?:,\d{3})*)$', detail_line)
-                                if price_match:
-                                    flight_data['price'] = float(price_match.group(1).replace(',', ''))
-                            
-                            # If we have the essential data, create the flight
-                            if flight_data.get('price'):
-                                flight = self._create_flight(flight_data, origin, destination, departure_date)
-                                if flight:
-                                    flights.append(flight)
-                            
-                            i += 3  # Skip the time lines we processed
-                            continue
+            # Look at next 12 lines for airline, duration, stops, price
+            for detail_line in detail_lines[:12]:
+                # Stop if we hit another flight (another time)
+                if _DEP_TIME_PATTERN.match(detail_line):
+                    break
+                
+                # Airline detection
+                if 'airline' not in flight_data:
+                    airline_match = _AIRLINE_PATTERN.search(detail_line)
+                    if airline_match:
+                        flight_data['airline'] = _AIRLINE_NAMES[airline_match.group(0).lower()]
+                
+                # Duration (e.g., "5 hr 32 min")
+                if 'duration' not in flight_data:
+                    duration_match = _DURATION_PATTERN.search(detail_line)
+                    if duration_match:
+                        hours = int(duration_match.group(1))
+                        mins = int(duration_match.group(2) or 0)
+                        flight_data['duration'] = hours * 60 + mins
+                
+                # Route (e.g., "SFO–JFK")
+                if 'route' not in flight_data:
+                    route_match = _ROUTE_PATTERN.search(detail_line)
+                    if route_match:
+                        flight_data['route'] = f"{route_match.group(1)}-{route_match.group(2)}"
+                
+                # Stops
+                if 'stops' not in flight_data:
+                    detail_lower = detail_line.lower()
+                    for token, stops in _STOP_TOKENS:
+                        if token in detail_lower:
+                            flight_data['stops'] = stops
+                            break
+                
+                # Price (e.g., "$420")
+                if 'price' not in flight_data:
+                    price_match = _PRICE_PATTERN.match(detail_line)
+                    if price_match:
+                        flight_data['price'] = float(price_match.group(1).replace(',', ''))
+                
+                # Nothing left to look for in this row
+                if _DETAIL_FIELDS <= flight_data.keys():
+                    break
             
-            i += 1
+            # If we have the essential data, create the flight
+            if flight_data.get('price'):
+                flight = self._create_flight(flight_data, origin, destination, departure_date, scraped_at)
+                if flight:
+                    flights.append(flight)
         
         return flights
     
@@ -250,7 +378,8 @@ class GoogleFlightsScraper(BaseScraper):
         data: Dict[str, Any],
         origin: str,
         destination: str,
-        departure_date: date
+        departure_date: date,
+        scraped_at: datetime
     ) -> Optional[FlightAvailability]:
         """Create FlightAvailability from parsed data"""
         
@@ -264,11 +393,13 @@ class GoogleFlightsScraper(BaseScraper):
             airline_code = self._get_airline_code(airline)
             
             # Generate ID
-            flight_id = hashlib.md5(
-                f"google:{origin}:{destination}:{departure_date}:{dep_time}:{airline}".encode()
-            ).hexdigest()[:12]
+            flight_id = hashlib.blake2b(
+                f"google:{origin}:{destination}:{departure_date}:{dep_time}:{airline}".encode(),
+                digest_size=6
+            ).hexdigest()
             
             return FlightAvailability(
+                **_FLIGHT_DEFAULTS,
                 id=flight_id,
                 source_program=self.program_name,
                 origin=origin,
@@ -279,14 +410,10 @@ class GoogleFlightsScraper(BaseScraper):
                 departure_time=dep_time,
                 arrival_time=arr_time,
                 duration_minutes=data.get('duration', 0),
-                cabin_class=CabinClass.ECONOMY,
-                points_required=0,  # Google shows cash only
                 cash_price=data.get('price', 0),
-                taxes_fees=0,
-                seats_available=0,
                 stops=data.get('stops', 0),
                 connection_airports=[],
-                scraped_at=datetime.utcnow(),
+                scraped_at=scraped_at,
                 raw_data={
                     'source': 'google_flights',
                     'airline_name': airline,
@@ -296,12 +423,14 @@ class GoogleFlightsScraper(BaseScraper):
             logger.warning(f"Failed to create flight: {e}")
             return None
     
-    def _parse_time(self, time_str: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _parse_time(time_str: str) -> str:
         """Parse time string to HH:MM format"""
         if not time_str:
             return "00:00"
         
-        match = re.match(r'(\d{1,2}):(\d{2})\s*(AM|PM)?', time_str, re.I)
+        match = _CLOCK_TIME_PATTERN.match(time_str)
         if match:
             hour = int(match.group(1))
             minute = int(match.group(2))
@@ -317,29 +446,16 @@ class GoogleFlightsScraper(BaseScraper):
         
         return "00:00"
     
-    def _get_airline_code(self, airline_name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _get_airline_code(airline_name: str) -> str:
         """Map airline name to IATA code"""
-        codes = {
-            'united': 'UA',
-            'delta': 'DL',
-            'american': 'AA',
-            'jetblue': 'B6',
-            'alaska': 'AS',
-            'southwest': 'WN',
-            'spirit': 'NK',
-            'frontier': 'F9',
-            'hawaiian': 'HA',
-            'air canada': 'AC',
-            'british airways': 'BA',
-            'lufthansa': 'LH',
-            'virgin': 'VS',
-            'emirates': 'EK',
-            'qatar': 'QR',
-            'singapore': 'SQ',
-        }
-        
         name_lower = airline_name.lower()
-        for name, code in codes.items():
+        code = _AIRLINE_CODES.get(name_lower)
+        if code:
+            return code
+        
+        for name, code in _AIRLINE_CODES.items():
             if name in name_lower:
                 return code
         
@@ -6,14 +6,20 @@ Supports routes to USA, Mexico, Caribbean, and select transatlantic.
 
 Now uses Playwright with stealth for better bot evasion.
 """
-from datetime import date, datetime
+from datetime import date, datetime, timezone
+from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
+import gzip
 import hashlib
+import json
+import random
 import re
 import asyncio
 import time
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
 from loguru import logger
 
 from scraper.base import (
@@ -23,6 +29,7 @@ from scraper.base import (
     ScrapeResult,
     CaptchaError,
     BlockedError,
+    ResultCache,
 )
 from config import settings
 
@@ -42,12 +49,167 @@ try:
     from selenium.webdriver.common.keys import Keys
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
-    from scraper.browser import create_browser_manager, BrowserManager
+    from scraper.browser import create_browser_manager
     HAS_SELENIUM = True
 except ImportError:
     HAS_SELENIUM = False
 
 
+# JetBlue flight number (e.g., "B6 583"); findall counts legs on a card
+_FLIGHT_NUMBER_PATTERN = re.compile(r'B6\s*(\d+)')
+
+# Clock times anywhere in card text (e.g., "5:45am")
+_CARD_TIME_PATTERN = re.compile(r'\d{1,2}:\d{2}\s*(?:am|pm)', re.I)
+
+# Duration in card text (e.g., "5h 52m")
+_CARD_DURATION_PATTERN = re.compile(r'(\d+)h\s*(\d+)m')
+
+# Dollar amount with thousands separators (e.g., "$1,234")
+_DOLLAR_PRICE_PATTERN = re.compile(r'\$(\d{1,3}(?:,\d{3})*)')
+
+# Points amount with label (e.g., "12,500 pts")
+_POINTS_LABEL_PATTERN = re.compile(r'(\d{1,3}(?:,\d{3})*)\s*(?:points|pts)', re.I)
+
+# Stop labels, Mint cabin markers and flight numbers in card text, found in
+# one pass; the flight number stays case-sensitive like _FLIGHT_NUMBER_PATTERN
+_CARD_FEATURES_PATTERN = re.compile(
+    r'(?P<nonstop>(?i:nonstop|direct))'
+    r'|(?P<stops>[123])(?i: stop)'
+    r'|(?P<mint>(?i:mint class|mint lie-flat))'
+    r'|(?P<leg>B6\s*\d+)'
+)
+
+# Flight card selectors, compiled once: primary, fallbacks, then any div
+# whose class mentions flight-result (case-insensitive)
+_CARD_SELECTOR = CSSSelector('.flight-result-item', translator="html")
+_FALLBACK_CARD_SELECTOR = CSSSelector(
+    '[data-qaid="flightCard"], .flight-result-card, .flight-option', translator="html"
+)
+_FLIGHT_RESULT_DIV_XPATH = etree.XPath(
+    "//div[re:test(@class, 'flight-result', 'i')]",
+    namespaces={"re": "http://exslt.org/regular-expressions"}
+)
+
+# Ancestor classes that scope nested card fields, see _collect_card_fields
+_CARD_SCOPES = {
+    'flight-duration__button': 'flight_button',
+    'flight-times__item': 'times_item',
+    'cb-bundle-price__price': 'bundle_price',
+}
+_CABIN_SCOPE_CLASSES = frozenset(('body', 'mb0', 'core-blue'))
+
+
+# Block page markers, matched case-insensitively in one scan; the named
+# group marks CAPTCHA pages. The early check covers PerimeterX only.
+_BLOCK_PATTERN = re.compile(
+    r'(?P<captcha>captcha|challenge)|blocked|access denied|please verify|security check',
+    re.I
+)
+_EARLY_BLOCK_PATTERN = re.compile(r'(?P<captcha>px-captcha|perimeterx)|access denied', re.I)
+
+# XHR URLs that carry search availability JSON
+_RESULTS_API_PATTERN = re.compile(r'outboundLFS|/api/.*search', re.I)
+
+# ISO 8601 clock time and duration in the availability JSON
+_ISO_CLOCK_PATTERN = re.compile(r'T(\d{2}:\d{2})')
+_ISO_DURATION_PATTERN = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?')
+
+# Time with optional minutes and AM/PM, used by _parse_time
+_TIME_PATTERN = re.compile(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', re.I)
+
+# Hour and minute parts of a duration, used by _parse_duration
+_HOURS_PATTERN = re.compile(r'(\d+)\s*h', re.I)
+_MINUTES_PATTERN = re.compile(r'(\d+)\s*m', re.I)
+
+# First run of digits, used by _extract_points
+_DIGITS_PATTERN = re.compile(r'(\d+)')
+
+# Currency amount with optional cents, used by _extract_currency
+_CURRENCY_PATTERN = re.compile(r'\$?\s*(\d+(?:\.\d{2})?)')
+
+
+# True once result cards, or a no-flights/error message, have rendered
+_RESULTS_READY_JS = """() =>
+    document.querySelectorAll('.flight-result-item').length > 0
+    || document.querySelector('.no-flights-found, [class*="NoFlights"], .error-message') !== null"""
+
+# TrustArc "Accept All Cookies" button, probed when saved consent cookies
+# may have expired
+_CONSENT_BUTTON_SELECTOR = 'a.call:has-text("Accept All Cookies"), [aria-modal="true"] a.call'
+
+# Cookies/localStorage saved after TrustArc consent, reused across restarts
+_STORAGE_STATE_PATH = Path.home() / ".cache" / "seatsaero" / "jetblue_storage.json"
+
+# Gzipped results API responses keyed by search URL, reused across restarts
+_RESPONSE_CACHE_DIR = _STORAGE_STATE_PATH.parent / "jetblue"
+
+
+def _element_text(element) -> str:
+    """Text of an element, joined like bs4's get_text(strip=True)"""
+    return "".join(t.strip() for t in element.itertext())
+
+
+def _collect_card_fields(card) -> Dict[str, list]:
+    """
+    Sort a flight card's elements into field slots in one walk.
+    
+    Equivalent to running each field selector below against the card,
+    in document order, without re-walking the subtree per field:
+        flight_number  .flight-duration__button span
+        times          .flight-times__item .core-blue.body
+        duration       .flight-duration__time
+        points         .points-price, [class*="points"]
+        cash           .cb-bundle-price__price span
+        taxes          .taxes, .fees, [class*="tax"]
+        cabin          .body.mb0.core-blue b
+    """
+    fields = {
+        'flight_number': [], 'times': [], 'duration': [], 'points': [],
+        'cash': [], 'taxes': [], 'cabin': [],
+    }
+    # Open ancestors per scope, so nested selectors match descendants only
+    open_scopes = {'flight_button': 0, 'times_item': 0, 'bundle_price': 0, 'cabin': 0}
+    
+    for event, el in etree.iterwalk(card, events=("start", "end")):
+        if not isinstance(el.tag, str):
+            continue  # comments and processing instructions
+        
+        class_attr = el.get('class') or ''
+        classes = class_attr.split()
+        scopes = [_CARD_SCOPES[c] for c in classes if c in _CARD_SCOPES]
+        if _CABIN_SCOPE_CLASSES.issubset(classes):
+            scopes.append('cabin')
+        
+        if event == "end":
+            for scope in scopes:
+                open_scopes[scope] -= 1
+            continue
+        
+        tag = el.tag
+        if tag == 'span':
+            if open_scopes['flight_button']:
+                fields['flight_number'].append(el)
+            if open_scopes['bundle_price']:
+                fields['cash'].append(el)
+        elif tag == 'b' and open_scopes['cabin']:
+            fields['cabin'].append(el)
+        
+        if class_attr:
+            if open_scopes['times_item'] and 'core-blue' in classes and 'body' in classes:
+                fields['times'].append(el)
+            if 'flight-duration__time' in classes:
+                fields['duration'].append(el)
+            if 'points' in class_attr:
+                fields['points'].append(el)
+            if 'tax' in class_attr or 'fees' in classes or 'taxes' in classes:
+                fields['taxes'].append(el)
+        
+        for scope in scopes:
+            open_scopes[scope] += 1
+    
+    return fields
+
+
 class JetBlueTrueBlueScraper(BaseScraper):
     """
     Scraper for JetBlue TrueBlue award availability.
@@ -83,6 +245,11 @@ class JetBlueTrueBlueScraper(BaseScraper):
         CabinClass.FIRST: "MINT",        # Mint (no first class)
     }
     
+    # Concurrent searches in search_availability_batch. Each one launches
+    # its own Chromium, so this is kept low for memory as well as for
+    # PerimeterX rate heuristics
+    BATCH_CONCURRENCY = 2
+    
     # JetBlue fare families
     FARE_FAMILIES = {
         "BLUE_BASIC": CabinClass.ECONOMY,
@@ -171,6 +338,29 @@ class JetBlueTrueBlueScraper(BaseScraper):
         """
         logger.info(f"Searching JetBlue TrueBlue: {origin} → {destination} on {departure_date}")
         
+        # Serve identical recent searches without a browser trip
+        cache_key = (origin, destination, departure_date, cabin_class, passengers)
+        cached = self._get_cached_results(cache_key)
+        if cached is not None:
+            logger.info(f"Returning {len(cached)} cached JetBlue flights")
+            return cached
+        
+        # Then a results API response saved by an earlier run
+        search_url = self._build_search_url(origin, destination, departure_date, passengers)
+        data = await asyncio.to_thread(self._load_cached_response, search_url)
+        if data:
+            results = self._parse_results_json(
+                data, origin, destination, departure_date, cabin_class
+            )
+            if results:
+                logger.info(f"Returning {len(results)} JetBlue flights from disk cache")
+                self._cache_results(cache_key, results)
+                return results
+        
+        # Pace browser searches across all JetBlue scrapers; bursts of
+        # sessions are what trip PerimeterX
+        await self.rate_limiter.acquire()
+        
         # Try Playwright stealth first (preferred)
         if HAS_PLAYWRIGHT:
             try:
@@ -178,6 +368,7 @@ class JetBlueTrueBlueScraper(BaseScraper):
                     origin, destination, departure_date, cabin_class, passengers
                 )
                 if results:
+                    self._cache_results(cache_key, results)
                     return results
             except Exception as e:
                 logger.warning(f"Playwright search failed, trying Selenium: {e}")
@@ -188,6 +379,8 @@ class JetBlueTrueBlueScraper(BaseScraper):
                 results = await self._search_via_selenium(
                     origin, destination, departure_date, cabin_class, passengers
                 )
+                if results:
+                    self._cache_results(cache_key, results)
                 return results
             except CaptchaError:
                 logger.error("CAPTCHA encountered on JetBlue")
@@ -199,6 +392,56 @@ class JetBlueTrueBlueScraper(BaseScraper):
         logger.error("No browser automation available (install playwright or selenium)")
         return []
     
+    # ============== Result Cache ==============
+    
+    # Recent results keyed by (origin, destination, date, cabin, passengers),
+    # shared by all instances; least recently used entries are evicted first
+    RESULT_CACHE_SIZE = 512
+    _result_cache = ResultCache(RESULT_CACHE_SIZE)
+    
+    @classmethod
+    def _get_cached_results(cls, key: tuple) -> Optional[List[FlightAvailability]]:
+        """Return a copy of unexpired cached results for key, if any"""
+        return cls._result_cache.get(key)
+    
+    @classmethod
+    def _cache_results(cls, key: tuple, results: List[FlightAvailability]) -> None:
+        """Store results for key, evicting the least recently used entries"""
+        cls._result_cache.put(key, results, settings.jetblue_cache_ttl_secs)
+    
+    @staticmethod
+    def _response_cache_path(search_url: str) -> Path:
+        """Disk cache file for a search URL's results API response"""
+        key = hashlib.blake2b(search_url.encode(), digest_size=8).hexdigest()
+        return _RESPONSE_CACHE_DIR / f"{key}.json.gz"
+    
+    @classmethod
+    def _load_cached_response(cls, search_url: str) -> Optional[Dict[str, Any]]:
+        """Return the saved results API response for search_url if still fresh"""
+        path = cls._response_cache_path(search_url)
+        try:
+            if time.time() - path.stat().st_mtime > settings.jetblue_cache_ttl_secs:
+                path.unlink(missing_ok=True)
+                return None
+            with gzip.open(path, "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Could not read cached JetBlue response: {e}")
+            return None
+    
+    @classmethod
+    def _store_response(cls, search_url: str, data: Dict[str, Any]) -> None:
+        """Save a results API response for later runs"""
+        path = cls._response_cache_path(search_url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(path, "wb", compresslevel=3) as f:
+                f.write(json.dumps(data, separators=(",", ":")).encode())
+        except Exception as e:
+            logger.debug(f"Could not cache JetBlue response: {e}")
+    
     # ============== Playwright Stealth Search (Preferred) ==============
     
     async def _search_via_playwright(
@@ -209,47 +452,50 @@ class JetBlueTrueBlueScraper(BaseScraper):
         cabin_class: Optional[CabinClass],
         passengers: int
     ) -> List[FlightAvailability]:
-        """Search using Playwright with stealth patches (async version)"""
-        from scraper.playwright_browser import AsyncPlaywrightStealthBrowser, StealthConfig
-        
-        browser = None
+        """Search using a Playwright stealth browser (async version)"""
+        browser = await self._launch_browser()
         try:
-            # Create async stealth browser configured for JetBlue
-            config = StealthConfig(
-                headless=getattr(settings, 'jetblue_headless', False),
-                min_delay=2.0,
-                max_delay=6.0,
-                locale="en-US",
-                timezone="America/New_York",
-                page_load_timeout=90000
-            )
-            
-            browser = AsyncPlaywrightStealthBrowser(config)
-            await browser.start()
-            
             page = await browser.new_page()
-            
+        except Exception:
+            await browser.close()
+            raise
+        
+        try:
             # Build search URL
             search_url = self._build_search_url(origin, destination, departure_date, passengers)
             logger.debug(f"JetBlue search URL: {search_url}")
             
+            # Capture the availability JSON the SPA fetches, so the rendered
+            # HTML only has to be parsed if it isn't seen
+            captured: Dict[str, Any] = {}
+            
+            async def _capture_results(response) -> None:
+                if response.status == 200 and _RESULTS_API_PATTERN.search(response.url):
+                    try:
+                        captured['data'] = await response.json()
+                    except Exception as e:
+                        logger.debug(f"Could not read JetBlue results JSON: {e}")
+            
+            page.on('response', _capture_results)
+            
             # Navigate to search page
             await page.goto(search_url, wait_until='domcontentloaded', timeout=90000)
             
             # Wait for initial page load
-            await asyncio.sleep(3)
+            try:
+                await page.wait_for_load_state('networkidle', timeout=20000)
+            except Exception as e:
+                logger.debug(f"Network idle wait timed out: {e}")
             
-            # Handle cookie consent popup (TrustArc)
-            await self._handle_cookie_consent(page)
+            # Handle cookie consent popup (TrustArc); a browser started from
+            # saved storage state usually carries the consent cookies, so only
+            # probe briefly in case they have expired or been cleared
+            if browser.config.storage_state is None or await self._consent_prompt_visible(page):
+                await self._handle_cookie_consent(page)
             
             # Check for blocks early
             html = await page.content()
-            html_lower = html.lower()
-            
-            if 'px-captcha' in html_lower or 'perimeterx' in html_lower:
-                raise CaptchaError("PerimeterX CAPTCHA detected on JetBlue")
-            if 'access denied' in html_lower:
-                raise BlockedError("Blocked by JetBlue")
+            self._check_for_blocks(html, _EARLY_BLOCK_PATTERN)
             
             # Wait for flight results to load - JetBlue uses .flight-result-item
             # Also check for "no flights" or error messages
@@ -257,40 +503,87 @@ class JetBlueTrueBlueScraper(BaseScraper):
             
             try:
                 # Wait for either flight results OR no flights message
-                await page.wait_for_selector(
-                    '.flight-result-item, .no-flights-found, [class*="NoFlights"], .error-message',
-                    timeout=30000
-                )
+                await page.wait_for_function(_RESULTS_READY_JS, timeout=25000)
             except Exception as e:
-                logger.debug(f"Initial selector wait timed out: {e}")
+                logger.debug(f"Results wait timed out: {e}")
             
-            # Additional wait for all results to load
-            await asyncio.sleep(5)
+            if captured.get('data'):
+                results = self._parse_results_json(
+                    captured['data'], origin, destination, departure_date, cabin_class
+                )
+                if results:
+                    logger.info(f"Found {len(results)} JetBlue flights via results API")
+                    await asyncio.to_thread(self._store_response, search_url, captured['data'])
+                    return results
             
             # Scroll to trigger lazy loading
             await page.evaluate('window.scrollTo(0, document.body.scrollHeight / 2)')
-            await asyncio.sleep(2)
+            
+            # Short pause for anti-bot cadence
+            await asyncio.sleep(0.5)
             
             # Get final HTML
             html = await page.content()
             
-            # Count what we found
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-            flight_cards = soup.select('.flight-result-item')
-            logger.debug(f"Found {len(flight_cards)} .flight-result-item elements")
-            
-            # Parse results
-            results = self._parse_results(
-                html, origin, destination, departure_date, cabin_class
+            # Parse results off the event loop so concurrent searches keep running
+            results = await asyncio.to_thread(
+                self._parse_results, html, origin, destination, departure_date, cabin_class
             )
             
             logger.info(f"Found {len(results)} JetBlue flights via Playwright")
             return results
             
         finally:
-            if browser:
-                await browser.close()
+            # Closing the browser closes its context and page
+            await browser.close()
+    
+    @staticmethod
+    async def _launch_browser():
+        """
+        Launch a stealth browser configured for JetBlue.
+        
+        Launched per search: a Playwright browser belongs to the event loop
+        that started it, and the API runs each scrape on its own loop.
+        """
+        from scraper.playwright_browser import AsyncPlaywrightStealthBrowser, StealthConfig
+        
+        config = StealthConfig(
+            headless=getattr(settings, 'jetblue_headless', False),
+            min_delay=2.0,
+            max_delay=6.0,
+            locale="en-US",
+            timezone="America/New_York",
+            page_load_timeout=90000
+        )
+        
+        # Reuse cookies saved after an earlier consent so the popup rarely shows
+        if _STORAGE_STATE_PATH.exists():
+            config.storage_state = str(_STORAGE_STATE_PATH)
+        
+        browser = AsyncPlaywrightStealthBrowser(config)
+        try:
+            return await browser.start()
+        except Exception as e:
+            if config.storage_state is None:
+                raise
+            await browser.close()
+            logger.warning(f"JetBlue launch with saved storage state failed, retrying without it: {e}")
+        
+        # A truncated or corrupt state file breaks every context; drop it once
+        # a launch without it succeeds
+        config.storage_state = None
+        browser = await AsyncPlaywrightStealthBrowser(config).start()
+        _STORAGE_STATE_PATH.unlink(missing_ok=True)
+        return browser
+    
+    @staticmethod
+    async def _consent_prompt_visible(page) -> bool:
+        """Briefly wait for the TrustArc Accept button; False if it doesn't show"""
+        try:
+            await page.wait_for_selector(_CONSENT_BUTTON_SELECTOR, state='visible', timeout=1500)
+            return True
+        except Exception:
+            return False
     
     async def _handle_cookie_consent(self, page) -> None:
         """Handle TrustArc cookie consent popup on JetBlue"""
@@ -317,6 +610,7 @@ class JetBlueTrueBlueScraper(BaseScraper):
                         await button.click()
                         logger.info("Cookie consent accepted")
                         await asyncio.sleep(1)  # Wait for popup to close
+                        await self._save_consent_state(page)
                         return
                 except Exception:
                     continue
@@ -353,6 +647,14 @@ class JetBlueTrueBlueScraper(BaseScraper):
         except Exception as e:
             logger.debug(f"Cookie consent handling error (non-fatal): {e}")
     
+    async def _save_consent_state(self, page) -> None:
+        """Persist cookies after accepting consent so later searches skip it"""
+        try:
+            _STORAGE_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            await page.context.storage_state(path=str(_STORAGE_STATE_PATH))
+        except Exception as e:
+            logger.warning(f"Failed to save JetBlue storage state: {e}")
+    
     # ============== Selenium Fallback ==============
     
     async def _search_via_selenium(
@@ -372,10 +674,13 @@ class JetBlueTrueBlueScraper(BaseScraper):
         driver = None
         
         try:
-            # Create browser manager
+            # Create browser manager; the performance log lets the results
+            # API response be read back over CDP instead of the whole DOM
             browser = create_browser_manager(program=self.program_name)
+            browser.profile.performance_logging = True
             
-            driver = browser.create_driver()
+            # Selenium calls block, so all of them run in worker threads
+            driver = await asyncio.to_thread(browser.create_driver)
             if not driver:
                 raise RuntimeError("Failed to create browser driver")
             
@@ -384,18 +689,32 @@ class JetBlueTrueBlueScraper(BaseScraper):
             logger.debug(f"JetBlue search URL: {search_url}")
             
             # Navigate with human-like behavior
-            driver.get(search_url)
-            await browser.human_delay(2, 4)
-            
-            # Check for blocks/captcha
-            self._check_for_blocks(driver)
+            await asyncio.to_thread(driver.get, search_url)
+            await asyncio.sleep(random.uniform(2, 4))
             
             # Wait for results to load
-            await self._wait_for_results(driver, browser)
+            await self._wait_for_results(driver)
+            
+            data = await asyncio.to_thread(self._read_results_json, driver)
+            if data:
+                results = self._parse_results_json(
+                    data, origin, destination, departure_date, cabin_class
+                )
+                if results:
+                    logger.info(f"Found {len(results)} JetBlue flights via results API")
+                    await asyncio.to_thread(self._store_response, search_url, data)
+                    return results
+            
+            # Fall back to the rendered page
+            html = await asyncio.to_thread(lambda: driver.page_source)
             
-            # Parse results
-            results = self._parse_results(
-                driver.page_source, 
+            # Check for blocks/captcha
+            self._check_for_blocks(html)
+            
+            # Parse results off the event loop so concurrent searches keep running
+            results = await asyncio.to_thread(
+                self._parse_results,
+                html, 
                 origin, 
                 destination, 
                 departure_date,
@@ -407,7 +726,39 @@ class JetBlueTrueBlueScraper(BaseScraper):
             
         finally:
             if browser:
-                browser.close()
+                await asyncio.to_thread(browser.close)
+    
+    def _read_results_json(self, driver) -> Optional[Dict[str, Any]]:
+        """Fetch the results API response body from the CDP performance log"""
+        try:
+            entries = driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"JetBlue performance log unavailable: {e}")
+            return None
+        
+        # Newest matching response wins, as with the Playwright capture
+        for entry in reversed(entries):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            if message.get('method') != 'Network.responseReceived':
+                continue
+            
+            params = message.get('params', {})
+            response = params.get('response', {})
+            if response.get('status') != 200 or not _RESULTS_API_PATTERN.search(response.get('url', '')):
+                continue
+            
+            try:
+                body = driver.execute_cdp_cmd(
+                    'Network.getResponseBody', {'requestId': params['requestId']}
+                )
+                return json.loads(body['body'])
+            except Exception as e:
+                logger.debug(f"Could not read JetBlue results JSON: {e}")
+        
+        return None
     
     def _build_search_url(
         self,
@@ -424,14 +775,12 @@ class JetBlueTrueBlueScraper(BaseScraper):
         URL params usePoints=true and redemPoint=true can be added when
         logged in session is available.
         """
-        date_str = departure_date.strftime("%Y-%m-%d")
-        
         # JetBlue URL format - basic search (no login required)
         url = (
             f"{self.base_url}/booking/flights"
             f"?from={origin}"
             f"&to={destination}"
-            f"&depart={date_str}"
+            f"&depart={departure_date.isoformat()}"
             f"&isMultiCity=false"
             f"&noOfRoute=1"
             f"&lang=en"
@@ -443,32 +792,27 @@ class JetBlueTrueBlueScraper(BaseScraper):
         
         return url
     
-    def _check_for_blocks(self, driver) -> None:
+    def _check_for_blocks(self, html: str, pattern: "re.Pattern[str]" = _BLOCK_PATTERN) -> None:
         """Check if we're blocked or facing CAPTCHA"""
-        html = driver.page_source.lower()
-        
-        block_indicators = [
-            "captcha",
-            "challenge",
-            "blocked",
-            "access denied",
-            "please verify",
-            "security check",
-        ]
+        # A CAPTCHA marker anywhere outranks a plain block marker
+        blocked = None
+        for match in pattern.finditer(html):
+            if match.lastgroup == 'captcha':
+                raise CaptchaError(f"CAPTCHA detected on JetBlue: {match.group().lower()}")
+            if blocked is None:
+                blocked = match.group().lower()
         
-        for indicator in block_indicators:
-            if indicator in html:
-                if "captcha" in indicator or "challenge" in indicator:
-                    raise CaptchaError(f"CAPTCHA detected on JetBlue")
-                raise BlockedError(f"Blocked by JetBlue: {indicator}")
+        if blocked:
+            raise BlockedError(f"Blocked by JetBlue: {blocked}")
     
-    async def _wait_for_results(self, driver, browser: BrowserManager) -> None:
+    async def _wait_for_results(self, driver) -> None:
         """Wait for flight results to load"""
         try:
             wait = WebDriverWait(driver, 15)
             
             # Wait for either results or no-flights message
-            wait.until(
+            await asyncio.to_thread(
+                wait.until,
                 EC.presence_of_element_located((
                     By.CSS_SELECTOR, 
                     "[data-qaid='flightCard'], .no-flights, .flight-results, .error-message"
@@ -476,7 +820,7 @@ class JetBlueTrueBlueScraper(BaseScraper):
             )
             
             # Additional wait for dynamic content
-            await browser.human_delay(2, 3)
+            await asyncio.sleep(random.uniform(2, 3))
             
         except Exception as e:
             logger.warning(f"Timeout waiting for JetBlue results: {e}")
@@ -492,25 +836,46 @@ class JetBlueTrueBlueScraper(BaseScraper):
         filter_cabin: Optional[CabinClass] = None
     ) -> List[FlightAvailability]:
         """Parse flight results from JetBlue page"""
-        soup = BeautifulSoup(html, 'html.parser')
+        if not html:
+            return []
+        
+        root = lxml.html.fromstring(html)
         flights = []
         
         # Find flight cards - JetBlue uses .flight-result-item class
-        flight_cards = soup.select('.flight-result-item')
+        flight_cards = _CARD_SELECTOR(root)
         
         if not flight_cards:
             # Fallback selectors
-            flight_cards = soup.select('[data-qaid="flightCard"], .flight-result-card, .flight-option')
+            flight_cards = _FALLBACK_CARD_SELECTOR(root)
         
         if not flight_cards:
             # Try alternative selectors
-            flight_cards = soup.find_all('div', class_=re.compile(r'flight-result', re.I))
+            flight_cards = _FLIGHT_RESULT_DIV_XPATH(root)
         
         logger.debug(f"Found {len(flight_cards)} flight cards in HTML")
         
+        # Flight IDs share this prefix; hash it once per page, not per card
+        id_hash = hashlib.blake2b(
+            f"{self.program_name}:{origin}:{destination}:{departure_date}:".encode(),
+            digest_size=6
+        )
+        
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        
         for card in flight_cards:
             try:
-                flight = self._parse_flight_card(card, origin, destination, departure_date)
+                # Card text for the regex fallbacks, walked once per card
+                card_text = " ".join(t for t in (t.strip() for t in card.itertext()) if t)
+                
+                # Skip cards whose text rules out the requested cabin before
+                # the full extraction
+                if filter_cabin and not self._may_match_cabin(card_text, filter_cabin):
+                    continue
+                
+                flight = self._parse_flight_card(
+                    card, origin, destination, departure_date, id_hash, scraped_at, card_text
+                )
                 if flight:
                     # Apply cabin filter if specified
                     if filter_cabin and flight.cabin_class != filter_cabin:
@@ -522,28 +887,144 @@ class JetBlueTrueBlueScraper(BaseScraper):
         
         return flights
     
+    def _parse_results_json(
+        self,
+        data: Dict[str, Any],
+        origin: str,
+        destination: str,
+        departure_date: date,
+        filter_cabin: Optional[CabinClass] = None
+    ) -> List[FlightAvailability]:
+        """
+        Parse the availability JSON captured from JetBlue's search API.
+        
+        Each itinerary has its segments and one bundle per fare family;
+        every available bundle becomes a FlightAvailability.
+        """
+        itineraries = data.get('itinerary') if isinstance(data, dict) else None
+        if not itineraries:
+            return []
+        
+        flights = []
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        
+        # Flight IDs share this prefix; hash it once per page, not per flight
+        id_hash = hashlib.blake2b(
+            f"{self.program_name}:{origin}:{destination}:{departure_date}:".encode(),
+            digest_size=6
+        )
+        
+        for itinerary in itineraries:
+            try:
+                segments = itinerary.get('segments') or []
+                
+                flight_number = "B6????"
+                if segments:
+                    flightno = str(segments[0].get('flightno', ''))
+                    match = _FLIGHT_NUMBER_PATTERN.search(flightno) or _DIGITS_PATTERN.search(flightno)
+                    if match:
+                        flight_number = f"B6{match.group(1)}"
+                
+                departure_time = self._parse_iso_time(itinerary.get('depart', ''))
+                arrival_time = self._parse_iso_time(itinerary.get('arrive', ''))
+                duration_minutes = self._parse_iso_duration(itinerary.get('duration', ''))
+                stops = max(len(segments) - 1, 0)
+                connection_airports = [seg.get('to', '') for seg in segments[:-1]]
+                
+                for bundle in itinerary.get('bundles') or []:
+                    if bundle.get('status', 'AVAILABLE') != 'AVAILABLE':
+                        continue
+                    
+                    cabin_class = self.FARE_FAMILIES.get(bundle.get('code'), CabinClass.ECONOMY)
+                    if filter_cabin and cabin_class != filter_cabin:
+                        continue
+                    
+                    points = int(float(bundle.get('points') or 0))
+                    cash_price = float(bundle.get('price') or 0)
+                    
+                    card_hash = id_hash.copy()
+                    card_hash.update(f"{flight_number}:{cabin_class.value}:{departure_time}".encode())
+                    
+                    flights.append(FlightAvailability(
+                        id=card_hash.hexdigest(),
+                        source_program=self.program_name,
+                        origin=origin,
+                        destination=destination,
+                        airline="B6",
+                        flight_number=flight_number,
+                        departure_date=departure_date,
+                        departure_time=departure_time,
+                        arrival_time=arrival_time,
+                        duration_minutes=duration_minutes,
+                        cabin_class=cabin_class,
+                        points_required=points,
+                        cash_price=cash_price,
+                        taxes_fees=5.60,  # Default JetBlue tax
+                        seats_available=1,  # JetBlue doesn't always show seat count
+                        stops=stops,
+                        connection_airports=connection_airports,
+                        scraped_at=scraped_at,
+                        raw_data={
+                            "fare_family": bundle.get('code'),
+                            "points_available": points > 0,
+                            "cash_fare_found": cash_price > 0,
+                        }
+                    ))
+            except Exception as e:
+                logger.warning(f"Failed to parse JetBlue itinerary: {e}")
+                continue
+        
+        return flights
+    
+    @staticmethod
+    def _may_match_cabin(card_text: str, cabin: CabinClass) -> bool:
+        """
+        Cheap check on card text for whether a card could parse as cabin.
+        
+        Mint (business) needs "mint" in the text and Even More Space
+        (premium economy) needs its label, so cards lacking them are
+        ruled out; anything else is left to the full parse.
+        """
+        text = card_text.lower()
+        if cabin in (CabinClass.BUSINESS, CabinClass.FIRST):
+            return 'mint' in text
+        if cabin == CabinClass.PREMIUM_ECONOMY:
+            return 'even more space' in text or 'extra' in text
+        return True
+    
     def _parse_flight_card(
         self,
-        card: BeautifulSoup,
+        card: lxml.html.HtmlElement,
         origin: str,
         destination: str,
-        departure_date: date
+        departure_date: date,
+        id_hash: "hashlib.blake2b",
+        scraped_at: datetime,
+        card_text: str
     ) -> Optional[FlightAvailability]:
-        """Parse a single flight card from JetBlue results"""
+        """
+        Parse a single flight card from JetBlue results.
+        
+        id_hash is a hasher already fed the search's program/route/date
+        prefix; it is copied per card to derive the flight ID. scraped_at
+        is shared by every card on the page, and card_text is the card's
+        whitespace-joined text.
+        """
+        
+        fields = _collect_card_fields(card)
         
         # Extract flight number - JetBlue shows it in .flight-duration__button span
         # Format: "B6 583" or in flight-duration area
         flight_number = "B6????"
-        flight_num_elem = card.select_one('.flight-duration__button span')
-        if flight_num_elem:
-            text = flight_num_elem.get_text(strip=True)
-            match = re.search(r'B6\s*(\d+)', text)
+        flight_num_elems = fields['flight_number']
+        if flight_num_elems:
+            text = _element_text(flight_num_elems[0])
+            match = _FLIGHT_NUMBER_PATTERN.search(text)
             if match:
                 flight_number = f"B6{match.group(1)}"
         else:
             # Fallback: search the whole card text
-            card_text = card.get_text()
-            match = re.search(r'B6\s*(\d+)', card_text)
+            match = _FLIGHT_NUMBER_PATTERN.search(card_text)
             if match:
                 flight_number = f"B6{match.group(1)}"
         
@@ -552,27 +1033,25 @@ class JetBlueTrueBlueScraper(BaseScraper):
         departure_time = "00:00"
         arrival_time = "00:00"
         
-        time_elems = card.select('.flight-times__item .core-blue.body')
+        time_elems = fields['times']
         if len(time_elems) >= 2:
-            departure_time = self._parse_time(time_elems[0].get_text(strip=True))
-            arrival_time = self._parse_time(time_elems[1].get_text(strip=True))
+            departure_time = self._parse_time(_element_text(time_elems[0]))
+            arrival_time = self._parse_time(_element_text(time_elems[1]))
         else:
             # Fallback: look for any time pattern in the card
-            card_text = card.get_text()
-            time_matches = re.findall(r'\d{1,2}:\d{2}\s*(?:am|pm)', card_text, re.I)
+            time_matches = _CARD_TIME_PATTERN.findall(card_text)
             if len(time_matches) >= 2:
                 departure_time = self._parse_time(time_matches[0])
                 arrival_time = self._parse_time(time_matches[1])
         
         # Extract duration - .flight-duration__time shows "10h 39m" or "5h 52m"
-        duration_elem = card.select_one('.flight-duration__time')
+        duration_elems = fields['duration']
         duration_minutes = 0
-        if duration_elem:
-            duration_minutes = self._parse_duration(duration_elem.get_text(strip=True))
+        if duration_elems:
+            duration_minutes = self._parse_duration(_element_text(duration_elems[0]))
         else:
             # Fallback: look for duration pattern
-            card_text = card.get_text()
-            match = re.search(r'(\d+)h\s*(\d+)m', card_text)
+            match = _CARD_DURATION_PATTERN.search(card_text)
             if match:
                 duration_minutes = int(match.group(1)) * 60 + int(match.group(2))
         
@@ -582,22 +1061,21 @@ class JetBlueTrueBlueScraper(BaseScraper):
         cash_price = 0.0
         
         # Try to find points price first
-        points_elem = card.select_one('.points-price, [class*="points"]')
-        if points_elem:
-            text = points_elem.get_text(strip=True)
+        points_elems = fields['points']
+        if points_elems:
+            text = _element_text(points_elems[0])
             points = self._extract_points(text)
         
         # If no points, get cash price from .cb-bundle-price__price span
         if points == 0:
-            cash_elem = card.select_one('.cb-bundle-price__price span')
-            if cash_elem:
-                text = cash_elem.get_text(strip=True)
+            cash_elems = fields['cash']
+            if cash_elems:
+                text = _element_text(cash_elems[0])
                 cash_price = self._extract_currency(text)
             
             # Fallback: look for $XXX pattern
             if cash_price == 0:
-                card_text = card.get_text()
-                match = re.search(r'\$(\d{1,3}(?:,\d{3})*)', card_text)
+                match = _DOLLAR_PRICE_PATTERN.search(card_text)
                 if match:
                     cash_price = float(match.group(1).replace(',', ''))
         
@@ -609,62 +1087,67 @@ class JetBlueTrueBlueScraper(BaseScraper):
         
         # Search for any number that looks like points in card
         if points == 0:
-            card_text = card.get_text()
-            match = re.search(r'(\d{1,3}(?:,\d{3})*)\s*(?:points|pts)', card_text, re.I)
+            match = _POINTS_LABEL_PATTERN.search(card_text)
             if match:
                 points = int(match.group(1).replace(',', ''))
         
         # Extract taxes/fees
-        taxes_elem = card.select_one('.taxes, .fees, [class*="tax"]')
+        taxes_elems = fields['taxes']
         taxes = 5.60  # Default JetBlue tax
-        if taxes_elem:
-            taxes = self._extract_currency(taxes_elem.get_text(strip=True))
+        if taxes_elems:
+            taxes = self._extract_currency(_element_text(taxes_elems[0]))
         
         # Determine cabin class - look for Mint designation
         # .body.mb0.core-blue b contains "Economy" or cabin info
         cabin_class = CabinClass.ECONOMY
-        cabin_elem = card.select_one('.body.mb0.core-blue b')
-        if cabin_elem:
-            cabin_text = cabin_elem.get_text(strip=True).lower()
+        cabin_elems = fields['cabin']
+        if cabin_elems:
+            cabin_text = _element_text(cabin_elems[0]).lower()
             if 'mint' in cabin_text:
                 cabin_class = CabinClass.BUSINESS
             elif 'even more space' in cabin_text or 'extra' in cabin_text:
                 cabin_class = CabinClass.PREMIUM_ECONOMY
         
+        # One scan of the card text for stop labels, Mint markers and legs
+        has_nonstop = False
+        stop_counts = set()
+        has_mint_class = False
+        leg_count = 0
+        for match in _CARD_FEATURES_PATTERN.finditer(card_text):
+            feature = match.lastgroup
+            if feature == 'nonstop':
+                has_nonstop = True
+            elif feature == 'stops':
+                stop_counts.add(int(match.group('stops')))
+            elif feature == 'mint':
+                has_mint_class = True
+            else:
+                leg_count += 1
+        
         # Also check for Mint class marker
-        if card.select_one('[class*="mint"]') or 'mint' in card.get_text().lower():
-            if cabin_class == CabinClass.ECONOMY:
-                # Only upgrade if we detect Mint
-                card_text = card.get_text().lower()
-                if 'mint class' in card_text or 'mint lie-flat' in card_text:
-                    cabin_class = CabinClass.BUSINESS
+        if cabin_class == CabinClass.ECONOMY and has_mint_class:
+            # Only upgrade if we detect Mint
+            cabin_class = CabinClass.BUSINESS
         
         # Extract stops - .flight-duration__button may show "1 stop" info
         stops = 0
-        card_text = card.get_text().lower()
-        if 'nonstop' in card_text or 'direct' in card_text:
+        if has_nonstop:
             stops = 0
-        elif '1 stop' in card_text:
-            stops = 1
-        elif '2 stop' in card_text:
-            stops = 2
-        elif '3 stop' in card_text:
-            stops = 3
-        else:
-            # Check for multiple flight numbers (indicates connection)
-            flight_matches = re.findall(r'B6\s*\d+', card.get_text())
-            if len(flight_matches) > 1:
-                stops = len(flight_matches) - 1
+        elif stop_counts:
+            stops = min(stop_counts)
+        elif leg_count > 1:
+            # Multiple flight numbers indicate a connection
+            stops = leg_count - 1
         
         # Skip cards that don't look like valid flight results
         if departure_time == "00:00" and arrival_time == "00:00" and duration_minutes == 0:
             # Probably not a flight card
             return None
         
-        # Generate unique ID
-        flight_id = hashlib.md5(
-            f"{self.program_name}:{flight_number}:{origin}:{destination}:{departure_date}:{cabin_class.value}:{departure_time}".encode()
-        ).hexdigest()[:12]
+        # Generate unique ID from the shared route prefix plus card fields
+        card_hash = id_hash.copy()
+        card_hash.update(f"{flight_number}:{cabin_class.value}:{departure_time}".encode())
+        flight_id = card_hash.hexdigest()
         
         return FlightAvailability(
             id=flight_id,
@@ -684,9 +1167,13 @@ class JetBlueTrueBlueScraper(BaseScraper):
             seats_available=1,  # JetBlue doesn't always show seat count
             stops=stops,
             connection_airports=[],
-            scraped_at=datetime.utcnow(),
+            scraped_at=scraped_at,
             raw_data={
-                "html_snippet": str(card)[:500],
+                # Serializing the card is only worth it when debugging
+                "html_snippet": (
+                    lxml.html.tostring(card, encoding="unicode")[:500]
+                    if settings.jetblue_keep_html else ""
+                ),
                 "points_available": points > 0,
                 "cash_fare_found": cash_price > 0,
             }
@@ -697,7 +1184,7 @@ class JetBlueTrueBlueScraper(BaseScraper):
     def _parse_time(self, text: str) -> str:
         """Parse time string to HH:MM format"""
         # Handle formats like "6:45am", "11:30 PM", etc.
-        match = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm)?', text, re.I)
+        match = _TIME_PATTERN.search(text)
         if match:
             hour = int(match.group(1))
             minute = int(match.group(2) or 0)
@@ -712,17 +1199,29 @@ class JetBlueTrueBlueScraper(BaseScraper):
             return f"{hour:02d}:{minute:02d}"
         return "00:00"
     
+    def _parse_iso_time(self, text: str) -> str:
+        """Extract HH:MM from an ISO 8601 datetime (e.g., "2025-03-01T06:15:00-05:00")"""
+        match = _ISO_CLOCK_PATTERN.search(text)
+        return match.group(1) if match else "00:00"
+    
+    def _parse_iso_duration(self, text: str) -> int:
+        """Parse an ISO 8601 duration (e.g., "PT6H21M") to minutes"""
+        match = _ISO_DURATION_PATTERN.match(text)
+        if not match:
+            return 0
+        return int(match.group(1) or 0) * 60 + int(match.group(2) or 0)
+    
     def _parse_duration(self, text: str) -> int:
         """Parse duration string to minutes"""
         total = 0
         
         # Match hours
-        hours_match = re.search(r'(\d+)\s*h', text, re.I)
+        hours_match = _HOURS_PATTERN.search(text)
         if hours_match:
             total += int(hours_match.group(1)) * 60
         
         # Match minutes
-        mins_match = re.search(r'(\d+)\s*m', text, re.I)
+        mins_match = _MINUTES_PATTERN.search(text)
         if mins_match:
             total += int(mins_match.group(1))
         
@@ -732,14 +1231,14 @@ class JetBlueTrueBlueScraper(BaseScraper):
         """Extract points value from text"""
         # Remove commas and find numbers
         text = text.replace(',', '')
-        match = re.search(r'(\d+)', text)
+        match = _DIGITS_PATTERN.search(text)
         if match:
             return int(match.group(1))
         return 0
     
     def _extract_currency(self, text: str) -> float:
         """Extract currency value from text"""
-        match = re.search(r'\$?\s*(\d+(?:\.\d{2})?)', text)
+        match = _CURRENCY_PATTERN.search(text)
         if match:
             return float(match.group(1))
         return 0.0
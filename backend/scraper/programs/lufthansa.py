@@ -4,15 +4,21 @@ Lufthansa Miles & More Scraper - Award Flight Availability
 Primary program for European routes, especially Germany.
 Star Alliance member - can show partner awards.
 """
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any, Tuple
 import hashlib
+import html as html_lib
+import random
 import re
 import asyncio
+import functools
+import threading
 import time
 import json
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
 from loguru import logger
 
 from scraper.base import (
@@ -42,6 +48,117 @@ try:
 except ImportError:
     HAS_HTTPX = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# Airline code and flight number (e.g., "LH 400")
+_FLIGHT_NUMBER_PATTERN = re.compile(r'([A-Z]{2})\s*(\d+)')
+
+# Deletes thousands separators ("55,000" / "55.000") in one pass
+_THOUSANDS_SEPARATORS = str.maketrans('', '', ',.')
+
+# First run of digits, for miles and stop counts
+_DIGITS_PATTERN = re.compile(r'(\d+)')
+
+# Tax amount with optional currency symbol and comma/dot cents
+_MONEY_PATTERN = re.compile(r'[\$€£]?\s*(\d+(?:[.,]\d{2})?)')
+
+# Clock time, used by _parse_time
+_TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})')
+
+# Hour and minute parts of a duration, used by _parse_duration
+_HOURS_PATTERN = re.compile(r'(\d+)\s*h', re.I)
+_MINUTES_PATTERN = re.compile(r'(\d+)\s*m', re.I)
+
+# First element matched by a list of [by, selector] locators (selenium's
+# "id", "css selector" and "xpath"), resolved in one browser round trip
+_FIND_ANY_JS = """
+for (const [by, selector] of arguments[0]) {
+    let el = null;
+    if (by === 'id') {
+        el = document.getElementById(selector);
+    } else if (by === 'xpath') {
+        el = document.evaluate(
+            selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+    } else {
+        el = document.querySelector(selector);
+    }
+    if (el) return el;
+}
+return null;
+"""
+
+# Block page markers in lowercased HTML, found in one scan; the named group
+# marks CAPTCHA pages
+_BLOCK_PATTERN = re.compile(
+    r'(?P<captcha>recaptcha|captcha|challenge)|blocked|access denied|security check'
+)
+
+# Opening tag of a result card; the regex fast path splits the page at these
+_CARD_START_PATTERN = re.compile(
+    r'<(?:div|article|li)\b[^>]*'
+    r'(?:data-testid="flight-card"|class="[^"]*(?<![\w-])(?:flight-result|offer-card)(?![\w-])[^"]*")'
+    r'[^>]*>',
+    re.I
+)
+
+# Markup stripped to get a card's text on the regex fast path
+_SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style)\b.*?</\1>', re.I | re.S)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Labelled fields in card text, used by the regex fast path
+_MILES_LABEL_PATTERN = re.compile(r'(\d{1,3}(?:[,.]\d{3})+|\d+)\s*miles', re.I)
+_DURATION_TEXT_PATTERN = re.compile(r'\d+\s*h(?:\s*\d+\s*m)?', re.I)
+_TAXES_TEXT_PATTERN = re.compile(r'[\$€£]\s*(\d+(?:[.,]\d{2})?)')
+_STOPS_TEXT_PATTERN = re.compile(r'(nonstop|direct)|(\d+)\s*stops?', re.I)
+
+# Flight card selectors, compiled once: primary, then any div whose class
+# mentions flight/offer/result (case-insensitive). The fallback lowercases
+# with translate() so matching stays in libxml2; EXSLT re:test would call
+# back into Python's re for every div.
+_CARD_SELECTOR = CSSSelector(
+    '[data-testid="flight-card"], .flight-result, .offer-card', translator="html"
+)
+_LOWER_CLASS = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_FALLBACK_CARD_XPATH = etree.XPath(
+    f"//div[contains({_LOWER_CLASS}, 'flight')"
+    f" or contains({_LOWER_CLASS}, 'offer')"
+    f" or contains({_LOWER_CLASS}, 'result')]"
+)
+
+# Field selectors within a flight card
+_FLIGHT_NUM_SELECTOR = CSSSelector(
+    '.flight-number, [class*="flightNumber"], [data-testid*="flight"]', translator="html"
+)
+_TIMES_SELECTOR = CSSSelector('.time, [class*="time"], time', translator="html")
+_DURATION_SELECTOR = CSSSelector('.duration, [class*="duration"]', translator="html")
+_MILES_SELECTOR = CSSSelector('.miles, [class*="miles"], [class*="price"]', translator="html")
+_TAXES_SELECTOR = CSSSelector('.taxes, [class*="tax"], [class*="fee"]', translator="html")
+_STOPS_SELECTOR = CSSSelector('.stops, [class*="stop"]', translator="html")
+
+
+def _select_in(selector: CSSSelector, card) -> list:
+    """Matches strictly below card (CSSSelector also tests card itself)"""
+    return [el for el in selector(card) if el is not card]
+
+
+def _get_first(mapping: Dict, keys: Tuple[str, ...], default: Any) -> Any:
+    """Value for the first of keys present in mapping, else default"""
+    for key in keys:
+        if key in mapping:
+            return mapping[key]
+    return default
+
+
+def _element_text(element) -> str:
+    """Text of an element, joined like bs4's get_text(strip=True)"""
+    return "".join(t.strip() for t in element.itertext())
+
 
 class LufthansaMilesMoreScraper(BaseScraper):
     """
@@ -104,67 +221,80 @@ class LufthansaMilesMoreScraper(BaseScraper):
     
     # ============== Resilient Locators ==============
     
-    def _get_origin_input_locators(self) -> List[Tuple[Any, str]]:
-        """Get locators for origin airport input"""
-        return [
-            (By.ID, "flightmanageralialialialialialialialialialialialiFrom"),
-            (By.CSS_SELECTOR, "[data-testid='origin-input']"),
-            (By.CSS_SELECTOR, "input[name='origin']"),
-            (By.CSS_SELECTOR, "input[placeholder*='From']"),
-            (By.CSS_SELECTOR, "[aria-label*='From']"),
-            (By.XPATH, "//input[contains(@id, 'from') or contains(@id, 'origin')]"),
-        ]
+    # Tried in order. By.* constants are plain strings ("id", "css selector",
+    # "xpath"); they are spelled out so these tuples are built once at import
+    # even where selenium isn't installed.
     
-    def _get_destination_input_locators(self) -> List[Tuple[Any, str]]:
-        """Get locators for destination airport input"""
-        return [
-            (By.ID, "flightmanageralialialialialialialialialialialialiTo"),
-            (By.CSS_SELECTOR, "[data-testid='destination-input']"),
-            (By.CSS_SELECTOR, "input[name='destination']"),
-            (By.CSS_SELECTOR, "input[placeholder*='To']"),
-            (By.CSS_SELECTOR, "[aria-label*='To']"),
-            (By.XPATH, "//input[contains(@id, 'to') or contains(@id, 'destination')]"),
-        ]
+    # Origin airport input
+    _ORIGIN_INPUT_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='origin-input']"),
+        ("css selector", "input[name='origin']"),
+        ("css selector", "input[placeholder*='From']"),
+        ("css selector", "[aria-label*='From']"),
+        ("xpath", "//input[contains(@id, 'from') or contains(@id, 'origin')]"),
+    )
     
-    def _get_date_input_locators(self) -> List[Tuple[Any, str]]:
-        """Get locators for departure date"""
-        return [
-            (By.CSS_SELECTOR, "[data-testid='departure-date']"),
-            (By.CSS_SELECTOR, "input[name='departureDate']"),
-            (By.CSS_SELECTOR, "button[aria-label*='departure']"),
-            (By.XPATH, "//button[contains(@aria-label, 'Depart')]"),
-        ]
+    # Destination airport input
+    _DESTINATION_INPUT_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='destination-input']"),
+        ("css selector", "input[name='destination']"),
+        ("css selector", "input[placeholder*='To']"),
+        ("css selector", "[aria-label*='To']"),
+        ("xpath", "//input[contains(@id, 'to') or contains(@id, 'destination')]"),
+    )
     
-    def _get_award_toggle_locators(self) -> List[Tuple[Any, str]]:
-        """Get locators for award/miles toggle"""
-        return [
-            (By.CSS_SELECTOR, "[data-testid='miles-toggle']"),
-            (By.CSS_SELECTOR, "input[name='payWithMiles']"),
-            (By.XPATH, "//label[contains(text(), 'Pay with miles')]"),
-            (By.XPATH, "//label[contains(text(), 'Miles')]"),
-            (By.CSS_SELECTOR, "[aria-label*='miles']"),
-        ]
+    # Departure date
+    _DATE_INPUT_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='departure-date']"),
+        ("css selector", "input[name='departureDate']"),
+        ("css selector", "button[aria-label*='departure']"),
+        ("xpath", "//button[contains(@aria-label, 'Depart')]"),
+    )
     
-    def _get_search_button_locators(self) -> List[Tuple[Any, str]]:
-        """Get locators for search button"""
-        return [
-            (By.CSS_SELECTOR, "[data-testid='search-button']"),
-            (By.CSS_SELECTOR, "button[type='submit']"),
-            (By.XPATH, "//button[contains(text(), 'Search')]"),
-            (By.XPATH, "//button[contains(text(), 'Find flights')]"),
-        ]
+    # Award/miles toggle
+    _AWARD_TOGGLE_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='miles-toggle']"),
+        ("css selector", "input[name='payWithMiles']"),
+        ("xpath", "//label[contains(text(), 'Pay with miles')]"),
+        ("xpath", "//label[contains(text(), 'Miles')]"),
+        ("css selector", "[aria-label*='miles']"),
+    )
     
-    def _get_flight_card_locators(self) -> List[Tuple[Any, str]]:
-        """Get locators for flight result cards"""
-        return [
-            (By.CSS_SELECTOR, "[data-testid='flight-card']"),
-            (By.CSS_SELECTOR, ".flight-result"),
-            (By.CSS_SELECTOR, "[class*='FlightOption']"),
-            (By.CSS_SELECTOR, ".offer-card"),
-        ]
+    # Search button
+    _SEARCH_BUTTON_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='search-button']"),
+        ("css selector", "button[type='submit']"),
+        ("xpath", "//button[contains(text(), 'Search')]"),
+        ("xpath", "//button[contains(text(), 'Find flights')]"),
+    )
+    
+    # Cookie consent accept button
+    _COOKIE_ACCEPT_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='accept-cookies']"),
+        ("css selector", "button[id*='cookie'][id*='accept']"),
+        ("css selector", ".cookie-accept"),
+        ("css selector", "button.accept-all"),
+    )
+    
+    # Loading overlay shown while the form or results update
+    _SPINNER_LOCATOR = ("css selector", ".loading-spinner, [class*='spinner']")
+    
+    # Airport autocomplete suggestions
+    _SUGGESTION_LOCATOR = ("css selector", "[role='listbox'] [role='option'], [role='option']")
+    
+    # Flight result cards
+    _FLIGHT_CARD_LOCATORS: Tuple[Tuple[str, str], ...] = (
+        ("css selector", "[data-testid='flight-card']"),
+        ("css selector", ".flight-result"),
+        ("css selector", "[class*='FlightOption']"),
+        ("css selector", ".offer-card"),
+    )
     
     # ============== Main Search Method ==============
     
+    # Seconds the API search runs alone before the browser search starts
+    API_HEAD_START_SECS = 3
+    
     async def search_availability(
         self,
         origin: str,
@@ -178,27 +308,130 @@ class LufthansaMilesMoreScraper(BaseScraper):
         
         Strategy:
         1. Try API search first (faster, more reliable when working)
-        2. Fall back to browser scraping
+        2. If it hasn't answered within API_HEAD_START_SECS, start browser
+           scraping alongside it; API results still win, and the other
+           search is cancelled once an answer is settled
         """
         logger.info(f"Searching Lufthansa M&M: {origin} → {destination} on {departure_date}")
         
-        # Try API first
+        api_task = asyncio.create_task(
+            self._search_via_api(origin, destination, departure_date, cabin_class, passengers)
+        )
+        browser_task = None
+        
+        try:
+            await asyncio.wait({api_task}, timeout=self.API_HEAD_START_SECS)
+            if api_task.done():
+                results = await self._api_task_results(api_task)
+                if results:
+                    return results
+            
+            browser_task = asyncio.create_task(
+                self._search_via_browser(origin, destination, departure_date, cabin_class, passengers)
+            )
+            
+            if not api_task.done():
+                await asyncio.wait({api_task, browser_task}, return_when=asyncio.FIRST_COMPLETED)
+                
+                # Browser results that beat the API are used as-is
+                if (
+                    browser_task.done() and not api_task.done()
+                    and browser_task.exception() is None and browser_task.result()
+                ):
+                    return browser_task.result()
+                
+                results = await self._api_task_results(api_task)
+                if results:
+                    return results
+            
+            return await self._browser_task_results(browser_task)
+        finally:
+            pending = [task for task in (api_task, browser_task) if task is not None and not task.done()]
+            for task in pending:
+                task.cancel()
+            # Let the cancelled searches unwind before the caller's loop closes
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    # Concurrent API searches in search_date_range, multiplexed over one
+    # HTTP/2 client for the call
+    API_CONCURRENCY = 32
+    
+    async def search_date_range(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        cabin_class: Optional[CabinClass] = None
+    ) -> List[FlightAvailability]:
+        """
+        Search availability across a date range.
+        
+        Every date is tried against the API concurrently (at most
+        API_CONCURRENCY at a time); dates it has no results for are then
+        scraped with the browser one at a time.
+        """
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        semaphore = asyncio.Semaphore(self.API_CONCURRENCY)
+        
+        client = self._new_http_client() if HAS_HTTPX else None
+        
+        async def _search_one(day: date) -> List[FlightAvailability]:
+            async with semaphore:
+                return await self._search_via_api(origin, destination, day, cabin_class, 1, client)
+        
         try:
-            results = await self._search_via_api(
-                origin, destination, departure_date, cabin_class, passengers
+            api_results = await asyncio.gather(
+                *(_search_one(day) for day in dates),
+                return_exceptions=True
             )
-            if results:
-                logger.info(f"Lufthansa API returned {len(results)} results")
-                return results
+        finally:
+            if client is not None:
+                await client.aclose()
+        
+        results = []
+        missing = []
+        for day, day_results in zip(dates, api_results):
+            if isinstance(day_results, BaseException):
+                logger.debug(f"Lufthansa API failed for {day}: {day_results}")
+                missing.append(day)
+            elif day_results:
+                results.extend(day_results)
+            else:
+                missing.append(day)
+        
+        logger.info(
+            f"Lufthansa API covered {len(dates) - len(missing)}/{len(dates)} dates "
+            f"for {origin} → {destination}"
+        )
+        
+        for day in missing:
+            try:
+                results.extend(await self._search_via_browser(
+                    origin, destination, day, cabin_class, 1
+                ))
+            except Exception as e:
+                logger.error(f"Error searching {day}: {e}")
+            await self._rate_limit_delay()
+        
+        return results
+    
+    async def _api_task_results(self, task: "asyncio.Task") -> List[FlightAvailability]:
+        """Results of an API search task, or [] if it failed"""
+        try:
+            results = await task
         except Exception as e:
             logger.debug(f"Lufthansa API failed, trying browser: {e}")
+            return []
         
-        # Fall back to browser
+        if results:
+            logger.info(f"Lufthansa API returned {len(results)} results")
+        return results
+    
+    async def _browser_task_results(self, task: "asyncio.Task") -> List[FlightAvailability]:
+        """Results of a browser search task; block errors propagate"""
         try:
-            results = await self._search_via_browser(
-                origin, destination, departure_date, cabin_class, passengers
-            )
-            return results
+            return await task
         except CaptchaError:
             logger.error("CAPTCHA encountered on Lufthansa")
             raise
@@ -211,20 +444,46 @@ class LufthansaMilesMoreScraper(BaseScraper):
     
     # ============== API Search ==============
     
+    @staticmethod
+    def _new_http_client() -> "httpx.AsyncClient":
+        """
+        API client for one search call.
+        
+        Not shared across calls: pooled connections belong to the event loop
+        that opened them, and the API runs each scrape on its own loop.
+        """
+        return httpx.AsyncClient(
+            http2=True,
+            timeout=20,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    
     async def _search_via_api(
         self,
         origin: str,
         destination: str,
         departure_date: date,
         cabin_class: Optional[CabinClass],
-        passengers: int
+        passengers: int,
+        client: Optional["httpx.AsyncClient"] = None
     ) -> List[FlightAvailability]:
-        """Search using Lufthansa's API (if accessible)"""
+        """
+        Search using Lufthansa's API (if accessible).
+        
+        Uses client when given (search_date_range shares one across its
+        dates); otherwise opens and closes a client for this search.
+        """
         
         if not HAS_HTTPX:
             logger.debug("httpx not available for API search")
             return []
         
+        if client is None:
+            async with self._new_http_client() as client:
+                return await self._search_via_api(
+                    origin, destination, departure_date, cabin_class, passengers, client
+                )
+        
         # Build API request
         headers = {
             "Accept": "application/json",
@@ -251,24 +510,24 @@ class LufthansaMilesMoreScraper(BaseScraper):
         }
         
         try:
-            async with httpx.AsyncClient(http2=True, timeout=20) as client:
-                # Try award search endpoint
-                api_url = f"{self.base_url}{self.API_ENDPOINTS['award_search']}"
-                
-                response = await client.post(
-                    api_url,
-                    json=payload,
-                    headers=headers
-                )
+            # Try award search endpoint
+            api_url = f"{self.base_url}{self.API_ENDPOINTS['award_search']}"
+            
+            response = await client.post(
+                api_url,
+                json=payload,
+                headers=headers
+            )
+            
+            if response.status_code == 200:
+                # orjson decodes the raw bytes directly, skipping text decoding
+                data = orjson.loads(response.content) if HAS_ORJSON else response.json()
+                return self._parse_api_response(data, origin, destination, departure_date)
+            elif response.status_code in [401, 403]:
+                logger.debug("Lufthansa API requires authentication")
+            else:
+                logger.debug(f"Lufthansa API returned {response.status_code}")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    return self._parse_api_response(data, origin, destination, departure_date)
-                elif response.status_code in [401, 403]:
-                    logger.debug("Lufthansa API requires authentication")
-                else:
-                    logger.debug(f"Lufthansa API returned {response.status_code}")
-                    
         except Exception as e:
             logger.debug(f"Lufthansa API error: {e}")
         
@@ -285,11 +544,15 @@ class LufthansaMilesMoreScraper(BaseScraper):
         flights = []
         
         # Handle various response structures
-        offers = data.get("offers", data.get("flights", data.get("results", [])))
+        offers = _get_first(data, ("offers", "flights", "results"), [])
+        id_hash = self._route_id_hash(origin, destination, departure_date)
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
         
         for offer in offers:
             try:
-                flight = self._parse_api_offer(offer, origin, destination, departure_date)
+                flight = self._parse_api_offer(
+                    offer, origin, destination, departure_date, id_hash, scraped_at
+                )
                 if flight:
                     flights.append(flight)
             except Exception as e:
@@ -302,7 +565,9 @@ class LufthansaMilesMoreScraper(BaseScraper):
         offer: Dict,
         origin: str,
         destination: str,
-        departure_date: date
+        departure_date: date,
+        id_hash: "hashlib.blake2b",
+        scraped_at: datetime
     ) -> Optional[FlightAvailability]:
         """Parse a single API offer"""
         
@@ -311,7 +576,7 @@ class LufthansaMilesMoreScraper(BaseScraper):
         first_segment = segments[0] if segments else offer
         
         # Flight details
-        airline = first_segment.get("carrier", first_segment.get("airline", "LH"))
+        airline = _get_first(first_segment, ("carrier", "airline"), "LH")
         flight_number = first_segment.get("flightNumber", "????")
         
         # Times
@@ -324,29 +589,30 @@ class LufthansaMilesMoreScraper(BaseScraper):
             duration_minutes = self._parse_duration(duration_minutes)
         
         # Award details
-        miles = offer.get("miles", offer.get("price", {}).get("miles", 0))
-        taxes = offer.get("taxes", offer.get("price", {}).get("taxes", 0))
+        price = offer.get("price", {})
+        miles = offer["miles"] if "miles" in offer else price.get("miles", 0)
+        taxes = offer["taxes"] if "taxes" in offer else price.get("taxes", 0)
         if isinstance(taxes, dict):
             taxes = taxes.get("amount", 0)
         
         # Cabin
-        cabin_str = offer.get("cabin", first_segment.get("cabin", "economy"))
-        cabin_class = self._map_cabin_class(cabin_str)
+        cabin_str = offer["cabin"] if "cabin" in offer else first_segment.get("cabin", "economy")
+        cabin_class = self._map_cabin_label(cabin_str)
         
         # Availability
-        seats = offer.get("seatsAvailable", offer.get("availability", 1))
+        seats = _get_first(offer, ("seatsAvailable", "availability"), 1)
         
         # Stops
         stops = len(segments) - 1 if len(segments) > 1 else 0
         connection_airports = [
-            s.get("destination", s.get("arrival", "")) 
+            _get_first(s, ("destination", "arrival"), "")
             for s in segments[:-1]
         ] if stops > 0 else []
         
         # Generate ID
-        flight_id = hashlib.md5(
-            f"{self.program_name}:{airline}{flight_number}:{origin}:{destination}:{departure_date}:{cabin_class.value}".encode()
-        ).hexdigest()[:12]
+        flight_hash = id_hash.copy()
+        flight_hash.update(f"{airline}{flight_number}:{cabin_class.value}".encode())
+        flight_id = flight_hash.hexdigest()
         
         return FlightAvailability(
             id=flight_id,
@@ -365,7 +631,7 @@ class LufthansaMilesMoreScraper(BaseScraper):
             seats_available=seats,
             stops=stops,
             connection_airports=connection_airports,
-            scraped_at=datetime.utcnow(),
+            scraped_at=scraped_at,
             raw_data={"api_offer": offer}
         )
     
@@ -384,44 +650,98 @@ class LufthansaMilesMoreScraper(BaseScraper):
         if not HAS_SELENIUM:
             raise RuntimeError("Selenium not installed")
         
-        browser = None
+        # Get proxy
+        proxy_config = None
+        if settings.proxy_enabled:
+            proxy_config = await get_proxy_pool().acquire(
+                self.program_name,
+                job_id=f"browser-{origin}-{destination}-{departure_date}"
+            )
+            if proxy_config:
+                self._current_proxy_id = proxy_config.id
+        
+        # Create browser manager
+        browser = create_browser_manager(
+            program=self.program_name,
+            proxy=proxy_config
+        )
         
+        # Selenium blocks, so the whole session runs in a worker thread that
+        # owns the driver from creation to close, and the API search racing
+        # it keeps making progress on the loop. A thread can't be
+        # interrupted; on cancellation the session stops at its next step
+        # and closes the browser.
+        cancelled = threading.Event()
         try:
-            # Create browser manager
-            browser = create_browser_manager(
-                program=self.program_name,
-                proxy_enabled=settings.proxy_enabled
+            return await asyncio.to_thread(
+                self._run_browser_search,
+                browser,
+                cancelled,
+                origin,
+                destination,
+                departure_date,
+                cabin_class,
+                passengers
             )
-            
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    def _run_browser_search(
+        self,
+        browser: BrowserManager,
+        cancelled: threading.Event,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        cabin_class: Optional[CabinClass],
+        passengers: int
+    ) -> List[FlightAvailability]:
+        """Drive one blocking Selenium search session (runs in a worker thread)"""
+        
+        def checkpoint() -> None:
+            if cancelled.is_set():
+                raise asyncio.CancelledError()
+        
+        try:
             driver = browser.create_driver()
             if not driver:
                 raise RuntimeError("Failed to create browser driver")
             
             # Navigate to award booking page
+            checkpoint()
             award_url = f"{self.base_url}/us/en/book-and-manage/book/award-flights"
             logger.debug(f"Navigating to: {award_url}")
             
             driver.get(award_url)
-            await browser.human_delay(3, 5)
+            self._settle(driver)
             
             # Check for blocks
-            self._check_for_blocks(driver)
+            self._check_for_blocks(driver.page_source.lower())
             
             # Handle cookie consent
-            await self._handle_cookie_consent(driver, browser)
+            checkpoint()
+            self._handle_cookie_consent(driver, browser)
             
             # Fill search form
-            await self._fill_search_form(driver, browser, origin, destination, departure_date, passengers)
+            checkpoint()
+            self._fill_search_form(driver, browser, origin, destination, departure_date, passengers)
             
             # Submit search
-            await self._submit_search(driver, browser)
+            checkpoint()
+            self._submit_search(driver, browser)
             
             # Wait for results
-            await self._wait_for_results(driver, browser)
+            self._wait_for_results(driver, browser)
+            
+            # Serialize the results page once for both the block check and parsing
+            checkpoint()
+            html = driver.page_source
+            self._check_for_blocks(html.lower())
             
             # Parse results
             results = self._parse_browser_results(
-                driver.page_source,
+                html,
                 origin,
                 destination,
                 departure_date,
@@ -432,49 +752,85 @@ class LufthansaMilesMoreScraper(BaseScraper):
             return results
             
         finally:
-            if browser:
-                browser.close()
-    
-    def _check_for_blocks(self, driver) -> None:
-        """Check if we're blocked or facing CAPTCHA"""
-        html = driver.page_source.lower()
-        
-        block_indicators = {
-            "captcha": CaptchaError,
-            "recaptcha": CaptchaError,
-            "challenge": CaptchaError,
-            "blocked": BlockedError,
-            "access denied": BlockedError,
-            "security check": BlockedError,
-        }
+            browser.close()
+    
+    def _check_for_blocks(self, html_lower: str) -> None:
+        """Check lowercased page HTML for a block page or CAPTCHA"""
+        # A CAPTCHA marker anywhere outranks a plain block marker
+        blocked = None
+        for match in _BLOCK_PATTERN.finditer(html_lower):
+            if match.lastgroup == 'captcha':
+                raise CaptchaError(f"Blocked by Lufthansa: {match.group()}")
+            if blocked is None:
+                blocked = match.group()
+        
+        if blocked:
+            raise BlockedError(f"Blocked by Lufthansa: {blocked}")
+    
+    def _find_any(self, driver, locators: Tuple[Tuple[str, str], ...]):
+        """
+        Return the first element matched by locators, or None.
+        
+        All locators are tried in a single script call instead of one
+        find_element round trip (and implicit wait) per miss.
+        """
+        try:
+            return driver.execute_script(_FIND_ANY_JS, [list(locator) for locator in locators])
+        except Exception as e:
+            logger.debug(f"Locator lookup failed: {e}")
+            return None
+    
+    def _settle(self, driver, timeout: float = 3) -> None:
+        """
+        Wait for any loading spinner to clear, then pause briefly.
+        
+        The short random pause is the only fixed delay between form
+        steps, kept for anti-bot cadence.
+        """
+        try:
+            WebDriverWait(driver, timeout).until(
+                EC.invisibility_of_element_located(self._SPINNER_LOCATOR)
+            )
+        except Exception:
+            pass
+        time.sleep(random.uniform(0.1, 0.3))
+    
+    def _click_when_ready(self, driver, browser: BrowserManager, element, timeout: float = 5) -> None:
+        """Wait until element is clickable, then click it like a person would"""
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable(element))
+        browser.human_click(element)
+    
+    def _enter_airport(self, driver, browser: BrowserManager, element, code: str) -> None:
+        """Type an airport code and pick the first autocomplete suggestion"""
+        self._click_when_ready(driver, browser, element)
+        browser.human_type(element, code, True)
+        
+        # Wait for the suggestion list rather than a fixed delay
+        try:
+            WebDriverWait(driver, 3).until(
+                EC.visibility_of_element_located(self._SUGGESTION_LOCATOR)
+            )
+        except Exception:
+            logger.debug(f"No autocomplete suggestions shown for {code}")
         
-        for indicator, error_class in block_indicators.items():
-            if indicator in html:
-                raise error_class(f"Blocked by Lufthansa: {indicator}")
+        element.send_keys(Keys.ARROW_DOWN, Keys.ENTER)
+        self._settle(driver)
     
-    async def _handle_cookie_consent(self, driver, browser: BrowserManager) -> None:
+    def _handle_cookie_consent(self, driver, browser: BrowserManager) -> None:
         """Handle cookie consent popup"""
+        btn = self._find_any(driver, self._COOKIE_ACCEPT_LOCATORS)
+        if btn is None:
+            logger.debug("No cookie consent found")
+            return
+        
         try:
-            consent_selectors = [
-                "[data-testid='accept-cookies']",
-                "button[id*='cookie'][id*='accept']",
-                ".cookie-accept",
-                "button.accept-all",
-            ]
-            
-            for selector in consent_selectors:
-                try:
-                    btn = driver.find_element(By.CSS_SELECTOR, selector)
-                    await browser.human_click(btn)
-                    await browser.human_delay(1, 2)
-                    logger.debug("Accepted cookie consent")
-                    return
-                except:
-                    continue
+            self._click_when_ready(driver, browser, btn)
+            self._settle(driver)
+            logger.debug("Accepted cookie consent")
         except Exception as e:
-            logger.debug(f"No cookie consent or failed: {e}")
+            logger.debug(f"Cookie consent failed: {e}")
     
-    async def _fill_search_form(
+    def _fill_search_form(
         self,
         driver,
         browser: BrowserManager,
@@ -486,89 +842,72 @@ class LufthansaMilesMoreScraper(BaseScraper):
         """Fill in the search form"""
         
         # Enable award search first
-        for by, selector in self._get_award_toggle_locators():
+        toggle = self._find_any(driver, self._AWARD_TOGGLE_LOCATORS)
+        if toggle is not None:
             try:
-                toggle = driver.find_element(by, selector)
                 if not toggle.is_selected():
-                    await browser.human_click(toggle)
-                    await browser.human_delay(1, 2)
-                break
-            except:
-                continue
+                    self._click_when_ready(driver, browser, toggle)
+                    self._settle(driver)
+            except Exception as e:
+                logger.debug(f"Could not enable award search: {e}")
         
         # Enter origin
-        for by, selector in self._get_origin_input_locators():
+        origin_input = self._find_any(driver, self._ORIGIN_INPUT_LOCATORS)
+        if origin_input is not None:
             try:
-                origin_input = driver.find_element(by, selector)
-                await browser.human_click(origin_input)
-                await browser.human_type(origin_input, origin, clear_first=True)
-                await browser.human_delay(0.5, 1)
-                
-                # Select from dropdown
-                origin_input.send_keys(Keys.ARROW_DOWN)
-                await browser.human_delay(0.3, 0.5)
-                origin_input.send_keys(Keys.ENTER)
-                await browser.human_delay(0.5, 1)
-                break
+                self._enter_airport(driver, browser, origin_input, origin)
             except Exception as e:
-                continue
+                logger.debug(f"Could not enter origin: {e}")
         
         # Enter destination
-        for by, selector in self._get_destination_input_locators():
+        dest_input = self._find_any(driver, self._DESTINATION_INPUT_LOCATORS)
+        if dest_input is not None:
             try:
-                dest_input = driver.find_element(by, selector)
-                await browser.human_click(dest_input)
-                await browser.human_type(dest_input, destination, clear_first=True)
-                await browser.human_delay(0.5, 1)
-                
-                dest_input.send_keys(Keys.ARROW_DOWN)
-                await browser.human_delay(0.3, 0.5)
-                dest_input.send_keys(Keys.ENTER)
-                await browser.human_delay(0.5, 1)
-                break
-            except:
-                continue
+                self._enter_airport(driver, browser, dest_input, destination)
+            except Exception as e:
+                logger.debug(f"Could not enter destination: {e}")
         
         # Enter date - Lufthansa typically uses a date picker
-        for by, selector in self._get_date_input_locators():
+        date_elem = self._find_any(driver, self._DATE_INPUT_LOCATORS)
+        if date_elem is not None:
             try:
-                date_elem = driver.find_element(by, selector)
-                await browser.human_click(date_elem)
-                await browser.human_delay(0.5, 1)
+                self._click_when_ready(driver, browser, date_elem)
                 
-                # Type date in expected format
+                # Type date in expected format once the picker's input is ready
                 date_str = departure_date.strftime("%d/%m/%Y")
-                date_input = driver.find_element(By.CSS_SELECTOR, "input[type='date'], input[placeholder*='date']")
-                await browser.human_type(date_input, date_str, clear_first=True)
-                await browser.human_delay(0.5, 1)
-                break
-            except:
-                continue
+                date_input = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((
+                        By.CSS_SELECTOR, "input[type='date'], input[placeholder*='date']"
+                    ))
+                )
+                browser.human_type(date_input, date_str, True)
+                self._settle(driver)
+            except Exception as e:
+                logger.debug(f"Could not enter date: {e}")
     
-    async def _submit_search(self, driver, browser: BrowserManager) -> None:
+    def _submit_search(self, driver, browser: BrowserManager) -> None:
         """Submit the search form"""
-        for by, selector in self._get_search_button_locators():
+        search_btn = self._find_any(driver, self._SEARCH_BUTTON_LOCATORS)
+        if search_btn is not None:
             try:
-                search_btn = driver.find_element(by, selector)
-                await browser.human_click(search_btn)
+                self._click_when_ready(driver, browser, search_btn)
                 logger.debug("Clicked search button")
                 return
-            except:
-                continue
+            except Exception as e:
+                logger.debug(f"Could not click search button: {e}")
         
         logger.warning("Could not find search button")
     
-    async def _wait_for_results(self, driver, browser: BrowserManager) -> None:
+    def _wait_for_results(self, driver, browser: BrowserManager) -> None:
         """Wait for results to load"""
         try:
-            wait = WebDriverWait(driver, 20)
-            wait.until(
+            WebDriverWait(driver, 20).until(
                 EC.presence_of_element_located((
                     By.CSS_SELECTOR,
                     "[data-testid='flight-card'], .flight-result, .offer-card, .no-results"
                 ))
             )
-            await browser.human_delay(2, 3)
+            self._settle(driver)
         except Exception as e:
             logger.warning(f"Timeout waiting for Lufthansa results: {e}")
     
@@ -583,21 +922,36 @@ class LufthansaMilesMoreScraper(BaseScraper):
         filter_cabin: Optional[CabinClass] = None
     ) -> List[FlightAvailability]:
         """Parse flight results from browser HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
+        if not html:
+            return []
+        
+        if settings.lufthansa_fast_parse:
+            flights = self._parse_browser_results_fast(
+                html, origin, destination, departure_date, filter_cabin
+            )
+            if flights:
+                return flights
+            logger.debug("Lufthansa regex fast path found no flights, parsing HTML tree")
+        
+        root = lxml.html.fromstring(html)
         flights = []
+        id_hash = self._route_id_hash(origin, destination, departure_date)
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
         
         # Find flight cards using multiple selectors
-        flight_cards = soup.select('[data-testid="flight-card"], .flight-result, .offer-card')
+        flight_cards = _CARD_SELECTOR(root)
         
         if not flight_cards:
             # Try alternative patterns
-            flight_cards = soup.find_all('div', class_=re.compile(r'flight|offer|result', re.I))
+            flight_cards = _FALLBACK_CARD_XPATH(root)
         
         logger.debug(f"Found {len(flight_cards)} Lufthansa flight cards")
         
         for card in flight_cards:
             try:
-                flight = self._parse_flight_card(card, origin, destination, departure_date)
+                flight = self._parse_flight_card(
+                    card, origin, destination, departure_date, id_hash, scraped_at
+                )
                 if flight:
                     if filter_cabin and flight.cabin_class != filter_cabin:
                         continue
@@ -609,10 +963,12 @@ class LufthansaMilesMoreScraper(BaseScraper):
     
     def _parse_flight_card(
         self,
-        card: BeautifulSoup,
+        card: lxml.html.HtmlElement,
         origin: str,
         destination: str,
-        departure_date: date
+        departure_date: date,
+        id_hash: "hashlib.blake2b",
+        scraped_at: datetime
     ) -> Optional[FlightAvailability]:
         """Parse a single flight card from HTML"""
         
@@ -620,72 +976,186 @@ class LufthansaMilesMoreScraper(BaseScraper):
         airline = "LH"
         flight_number = "????"
         
-        flight_elem = card.select_one('.flight-number, [class*="flightNumber"], [data-testid*="flight"]')
-        if flight_elem:
-            text = flight_elem.get_text(strip=True)
-            match = re.search(r'([A-Z]{2})\s*(\d+)', text)
+        flight_elems = _select_in(_FLIGHT_NUM_SELECTOR, card)
+        if flight_elems:
+            text = _element_text(flight_elems[0])
+            match = _FLIGHT_NUMBER_PATTERN.search(text)
             if match:
                 airline = match.group(1)
                 flight_number = match.group(2)
         
         # Times
-        time_elems = card.select('.time, [class*="time"], time')
+        time_elems = _select_in(_TIMES_SELECTOR, card)
         departure_time = "00:00"
         arrival_time = "00:00"
         
         if len(time_elems) >= 2:
-            departure_time = self._parse_time(time_elems[0].get_text(strip=True))
-            arrival_time = self._parse_time(time_elems[1].get_text(strip=True))
+            departure_time = self._parse_time(_element_text(time_elems[0]))
+            arrival_time = self._parse_time(_element_text(time_elems[1]))
         
         # Duration
         duration_minutes = 0
-        duration_elem = card.select_one('.duration, [class*="duration"]')
-        if duration_elem:
-            duration_minutes = self._parse_duration(duration_elem.get_text(strip=True))
+        duration_elems = _select_in(_DURATION_SELECTOR, card)
+        if duration_elems:
+            duration_minutes = self._parse_duration(_element_text(duration_elems[0]))
         
         # Miles
         miles = 0
-        miles_elem = card.select_one('.miles, [class*="miles"], [class*="price"]')
-        if miles_elem:
-            text = miles_elem.get_text(strip=True).replace(',', '').replace('.', '')
-            match = re.search(r'(\d+)', text)
+        miles_elems = _select_in(_MILES_SELECTOR, card)
+        if miles_elems:
+            text = _element_text(miles_elems[0]).translate(_THOUSANDS_SEPARATORS)
+            match = _DIGITS_PATTERN.search(text)
             if match:
                 miles = int(match.group(1))
         
         # Taxes
         taxes = 0.0
-        taxes_elem = card.select_one('.taxes, [class*="tax"], [class*="fee"]')
-        if taxes_elem:
-            match = re.search(r'[\$€£]?\s*(\d+(?:[.,]\d{2})?)', taxes_elem.get_text())
+        taxes_elems = _select_in(_TAXES_SELECTOR, card)
+        if taxes_elems:
+            match = _MONEY_PATTERN.search(taxes_elems[0].text_content())
             if match:
                 taxes = float(match.group(1).replace(',', '.'))
         
-        # Cabin class
-        cabin_class = CabinClass.ECONOMY
-        card_text = card.get_text().lower()
-        if 'first' in card_text:
-            cabin_class = CabinClass.FIRST
-        elif 'business' in card_text:
-            cabin_class = CabinClass.BUSINESS
-        elif 'premium' in card_text:
-            cabin_class = CabinClass.PREMIUM_ECONOMY
+        # Cabin class, from one walk of the card's text
+        cabin_class = self._map_cabin_class(card.text_content())
         
         # Stops
         stops = 0
-        stops_elem = card.select_one('.stops, [class*="stop"]')
-        if stops_elem:
-            text = stops_elem.get_text().lower()
+        stops_elems = _select_in(_STOPS_SELECTOR, card)
+        if stops_elems:
+            text = stops_elems[0].text_content().lower()
             if 'nonstop' in text or 'direct' in text:
                 stops = 0
             else:
-                match = re.search(r'(\d+)', text)
+                match = _DIGITS_PATTERN.search(text)
                 if match:
                     stops = int(match.group(1))
         
-        # Generate ID
-        flight_id = hashlib.md5(
-            f"{self.program_name}:{airline}{flight_number}:{origin}:{destination}:{departure_date}:{cabin_class.value}".encode()
-        ).hexdigest()[:12]
+        return self._make_card_flight(
+            origin=origin,
+            destination=destination,
+            departure_date=departure_date,
+            airline=airline,
+            flight_number=flight_number,
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+            duration_minutes=duration_minutes,
+            cabin_class=cabin_class,
+            miles=miles,
+            taxes=taxes,
+            stops=stops,
+            # Serializing the card is only worth it when debugging
+            html_snippet=(
+                lxml.html.tostring(card, encoding="unicode")[:500]
+                if settings.lufthansa_keep_html else ""
+            ),
+            id_hash=id_hash,
+            scraped_at=scraped_at,
+        )
+    
+    def _parse_browser_results_fast(
+        self,
+        html: str,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        filter_cabin: Optional[CabinClass] = None
+    ) -> List[FlightAvailability]:
+        """
+        Parse flight cards with regexes alone, skipping the HTML tree.
+        
+        The page is split at card opening tags and each chunk's text is
+        searched for labelled fields ("12,500 miles", "$56.20", "8h 45m").
+        The last card has no following card to end it, so it is capped at
+        the longest earlier card. Returns [] when nothing parses, so the
+        caller can fall back to _parse_browser_results' tree parse.
+        """
+        starts = [m.end() for m in _CARD_START_PATTERN.finditer(html)]
+        if not starts:
+            return []
+        
+        ends = starts[1:] + [len(html)]
+        longest = max((end - start for start, end in zip(starts, ends[:-1])), default=len(html))
+        ends[-1] = min(ends[-1], starts[-1] + longest)
+        
+        flights = []
+        id_hash = self._route_id_hash(origin, destination, departure_date)
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        for start, end in zip(starts, ends):
+            chunk = html[start:end]
+            text = html_lib.unescape(_TAG_PATTERN.sub(" ", _SCRIPT_STYLE_PATTERN.sub(" ", chunk)))
+            
+            times = _TIME_PATTERN.findall(text)
+            if len(times) < 2:
+                continue  # not a flight card
+            
+            cabin_class = self._map_cabin_class(text)
+            if filter_cabin and cabin_class != filter_cabin:
+                continue
+            
+            airline = "LH"
+            flight_number = "????"
+            match = _FLIGHT_NUMBER_PATTERN.search(text)
+            if match:
+                airline, flight_number = match.group(1), match.group(2)
+            
+            match = _DURATION_TEXT_PATTERN.search(text)
+            duration_minutes = self._parse_duration(match.group()) if match else 0
+            
+            match = _MILES_LABEL_PATTERN.search(text)
+            miles = int(match.group(1).translate(_THOUSANDS_SEPARATORS)) if match else 0
+            
+            match = _TAXES_TEXT_PATTERN.search(text)
+            taxes = float(match.group(1).replace(',', '.')) if match else 0.0
+            
+            stops = 0
+            match = _STOPS_TEXT_PATTERN.search(text)
+            if match and match.group(2):
+                stops = int(match.group(2))
+            
+            flights.append(self._make_card_flight(
+                origin=origin,
+                destination=destination,
+                departure_date=departure_date,
+                airline=airline,
+                flight_number=flight_number,
+                departure_time=f"{int(times[0][0]):02d}:{times[0][1]}",
+                arrival_time=f"{int(times[1][0]):02d}:{times[1][1]}",
+                duration_minutes=duration_minutes,
+                cabin_class=cabin_class,
+                miles=miles,
+                taxes=taxes,
+                stops=stops,
+                html_snippet=chunk[:500] if settings.lufthansa_keep_html else "",
+                id_hash=id_hash,
+                scraped_at=scraped_at,
+            ))
+        
+        logger.debug(f"Lufthansa regex fast path parsed {len(flights)} flights")
+        return flights
+    
+    def _make_card_flight(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        airline: str,
+        flight_number: str,
+        departure_time: str,
+        arrival_time: str,
+        duration_minutes: int,
+        cabin_class: CabinClass,
+        miles: int,
+        taxes: float,
+        stops: int,
+        html_snippet: str,
+        id_hash: "hashlib.blake2b",
+        scraped_at: datetime
+    ) -> FlightAvailability:
+        """Build a FlightAvailability from fields scraped off a result card"""
+        flight_hash = id_hash.copy()
+        flight_hash.update(f"{airline}{flight_number}:{cabin_class.value}".encode())
+        flight_id = flight_hash.hexdigest()
         
         return FlightAvailability(
             id=flight_id,
@@ -704,14 +1174,31 @@ class LufthansaMilesMoreScraper(BaseScraper):
             seats_available=1,
             stops=stops,
             connection_airports=[],
-            scraped_at=datetime.utcnow(),
-            raw_data={"html_snippet": str(card)[:500]}
+            scraped_at=scraped_at,
+            raw_data={"html_snippet": html_snippet}
         )
     
     # ============== Helper Methods ==============
     
-    def _map_cabin_class(self, cabin_str: str) -> CabinClass:
-        """Map cabin string to CabinClass enum"""
+    def _route_id_hash(self, origin: str, destination: str, departure_date: date) -> "hashlib.blake2b":
+        """
+        BLAKE2b hasher already fed the flight-ID prefix shared by one
+        search's flights; copy it and add the flight and cabin per flight.
+        """
+        return hashlib.blake2b(
+            f"{self.program_name}:{origin}:{destination}:{departure_date}:".encode(),
+            digest_size=6
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _map_cabin_label(cabin_str: str) -> CabinClass:
+        """_map_cabin_class for API cabin labels, which repeat across offers"""
+        return LufthansaMilesMoreScraper._map_cabin_class(cabin_str)
+    
+    @staticmethod
+    def _map_cabin_class(cabin_str: str) -> CabinClass:
+        """Map cabin string (or card text) to CabinClass enum"""
         cabin_lower = cabin_str.lower()
         if 'first' in cabin_lower:
             return CabinClass.FIRST
@@ -723,7 +1210,7 @@ class LufthansaMilesMoreScraper(BaseScraper):
     
     def _parse_time(self, text: str) -> str:
         """Parse time string to HH:MM format"""
-        match = re.search(r'(\d{1,2}):(\d{2})', text)
+        match = _TIME_PATTERN.search(text)
         if match:
             return f"{int(match.group(1)):02d}:{match.group(2)}"
         return "00:00"
@@ -731,10 +1218,10 @@ class LufthansaMilesMoreScraper(BaseScraper):
     def _parse_duration(self, text: str) -> int:
         """Parse duration string to minutes"""
         total = 0
-        hours_match = re.search(r'(\d+)\s*h', text, re.I)
+        hours_match = _HOURS_PATTERN.search(text)
         if hours_match:
             total += int(hours_match.group(1)) * 60
-        mins_match = re.search(r'(\d+)\s*m', text, re.I)
+        mins_match = _MINUTES_PATTERN.search(text)
         if mins_match:
             total += int(mins_match.group(1))
         return total
@@ -1,13 +1,20 @@
 """
 United MileagePlus Scraper - Enhanced with resilient locators and human-like behavior
 """
-from datetime import date, datetime
-from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Tuple, Iterator, AsyncIterator
+import asyncio
+import functools
 import hashlib
 import re
+import threading
 
 import httpx
-from bs4 import BeautifulSoup
+import lxml.html
+from cssselect import HTMLTranslator
+from lxml import etree
+from lxml.cssselect import CSSSelector
 from loguru import logger
 
 from scraper.base import (
@@ -18,6 +25,7 @@ from scraper.base import (
     CaptchaError,
     BlockedError,
     RateLimitError,
+    ResultCache,
 )
 from scraper.browser import create_browser_manager, BrowserManager
 from scraper.proxy import get_proxy_pool
@@ -32,6 +40,119 @@ try:
 except ImportError:
     HAS_SELENIUM = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+
+# Everything but digits, stripped from miles text ("45.5K miles", "60,000")
+_NON_DIGIT_PATTERN = re.compile(r"[^\d]")
+
+# Clock times, with or without a colon ("7:45", "0745"), tried in order
+_TIME_PATTERNS = (
+    re.compile(r"(\d{1,2}):(\d{2})"),
+    re.compile(r"(\d{1,2})(\d{2})"),
+)
+
+
+# United endpoints, built once rather than per search
+_BASE_URL = "https://www.united.com"
+_SEARCH_PAGE_URL = f"{_BASE_URL}/en/us/book-flight/find-flights"
+_API_SEARCH_URL = f"{_BASE_URL}/api/flight/FetchFlights"
+
+# Fixed headers layered over get_headers() for API searches; read-only so
+# the shared mapping can't be mutated by a caller
+_API_HEADERS = MappingProxyType({
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "X-Requested-With": "XMLHttpRequest",
+    "Referer": _SEARCH_PAGE_URL,
+})
+
+
+def _compile_selectors(*selectors: str) -> Tuple[CSSSelector, ...]:
+    """Compile fallback CSS selectors once, in the order they are tried"""
+    return tuple(CSSSelector(selector, translator="html") for selector in selectors)
+
+
+_CSS_TO_XPATH = HTMLTranslator()
+
+
+def _compile_first_match(*selectors: str) -> Tuple[etree.XPath, ...]:
+    """Compile fallback CSS selectors to XPaths that stop at the first descendant"""
+    return tuple(
+        etree.XPath(f"({_CSS_TO_XPATH.css_to_xpath(selector, prefix='descendant::')})[1]")
+        for selector in selectors
+    )
+
+
+# Flight card containers, tried in order until one matches
+_FLIGHT_CARD_SELECTORS = _compile_selectors(
+    "[data-testid='flight-card']",
+    ".flight-result-card",
+    "[class*='FlightCard']",
+    ".flight-row",
+    "[class*='flightResult']",
+)
+
+# Per-card field fallbacks, tried in order; each yields at most the
+# card's first matching descendant
+_FLIGHT_NUM_SELECTORS = _compile_first_match(
+    "[data-testid='flight-number']",
+    ".flight-number",
+    "[class*='flightNumber']",
+)
+_DEP_TIME_SELECTORS = _compile_first_match(
+    "[data-testid='departure-time']",
+    ".departure-time",
+    "[class*='departTime']",
+)
+_ARR_TIME_SELECTORS = _compile_first_match(
+    "[data-testid='arrival-time']",
+    ".arrival-time",
+    "[class*='arrivalTime']",
+)
+_MILES_SELECTORS = _compile_first_match(
+    "[data-testid='miles-cost']",
+    ".miles-cost",
+    "[class*='miles']",
+)
+_CABIN_SELECTORS = _compile_first_match(
+    "[data-testid='cabin-class']",
+    ".cabin-class",
+    "[class*='cabin']",
+)
+
+
+def _element_text(element) -> str:
+    """Text of an element, joined like bs4's get_text(strip=True)"""
+    return "".join(t.strip() for t in element.itertext())
+
+
+class _AsyncByteReader:
+    """Async file-like view of a byte chunk iterator, as ijson expects"""
+    
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes with read(0) and accepts short reads after that;
+        # b"" marks the end of the body, so empty chunks are skipped
+        if size == 0:
+            return b""
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
 
 class UnitedMileagePlusScraper(BaseScraper):
     """
@@ -54,7 +175,7 @@ class UnitedMileagePlusScraper(BaseScraper):
     
     @property
     def base_url(self) -> str:
-        return "https://www.united.com"
+        return _BASE_URL
     
     @property
     def supported_airlines(self) -> List[str]:
@@ -148,6 +269,10 @@ class UnitedMileagePlusScraper(BaseScraper):
     
     # ============== Main Search Method ==============
     
+    # Seconds the API search runs alone before the browser search starts,
+    # so the usual API success never pays for a Selenium session
+    API_HEAD_START_SECS = 1.5
+    
     async def search_availability(
         self,
         origin: str,
@@ -159,27 +284,161 @@ class UnitedMileagePlusScraper(BaseScraper):
         """
         Search for award availability on United.
         
-        Tries API first, falls back to browser scraping.
+        Tries API first; if it hasn't answered within API_HEAD_START_SECS,
+        browser scraping starts alongside it and the first non-empty
+        answer wins (API results are preferred when both are ready).
         """
         logger.info(f"Searching United: {origin} → {destination} on {departure_date}")
         
-        # Try API method first (faster, less detectable)
+        # Serve identical recent searches without a network round-trip
+        cache_key = (origin.upper(), destination.upper(), departure_date, cabin_class, passengers)
+        cached = self._get_cached_results(cache_key)
+        if cached is not None:
+            logger.info(f"Returning {len(cached)} cached United flights")
+            return cached
+        
+        results = await self._search_hedged(
+            origin, destination, departure_date, cabin_class, passengers
+        )
+        self._cache_results(cache_key, results)
+        return results
+    
+    async def _search_hedged(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        cabin_class: Optional[CabinClass],
+        passengers: int
+    ) -> List[FlightAvailability]:
+        """Race the API search against a delayed browser search"""
+        api_task = asyncio.create_task(
+            self._search_via_api(origin, destination, departure_date, cabin_class, passengers)
+        )
+        browser_task = None
+        
         try:
-            results = await self._search_via_api(
-                origin, destination, departure_date, cabin_class, passengers
+            await asyncio.wait({api_task}, timeout=self.API_HEAD_START_SECS)
+            if api_task.done():
+                results = await self._api_task_results(api_task)
+                if results:
+                    return results
+            
+            logger.info("United API slow or empty, starting browser scraping")
+            browser_task = asyncio.create_task(
+                self._search_via_browser(origin, destination, departure_date, cabin_class, passengers)
             )
+            
+            if not api_task.done():
+                await asyncio.wait({api_task, browser_task}, return_when=asyncio.FIRST_COMPLETED)
+                
+                # Browser results that beat the API are used as-is
+                if (
+                    browser_task.done() and not api_task.done()
+                    and browser_task.exception() is None and browser_task.result()
+                ):
+                    return browser_task.result()
+                
+                results = await self._api_task_results(api_task)
+                if results:
+                    return results
+            
+            return await self._browser_task_results(browser_task)
+        finally:
+            pending = [task for task in (api_task, browser_task) if task is not None and not task.done()]
+            for task in pending:
+                task.cancel()
+            # Let the cancelled searches unwind before the caller's loop closes
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    # Concurrent API searches in search_date_range, multiplexed over the
+    # call's HTTP/2 clients
+    API_CONCURRENCY = 8
+    
+    async def search_date_range(
+        self,
+        origin: str,
+        destination: str,
+        start_date: date,
+        end_date: date,
+        cabin_class: Optional[CabinClass] = None
+    ) -> List[FlightAvailability]:
+        """
+        Search availability across a date range.
+        
+        Uncached dates are tried against the API concurrently (at most
+        API_CONCURRENCY at a time); dates it has no results for are then
+        scraped with the browser one at a time.
+        """
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        semaphore = asyncio.Semaphore(self.API_CONCURRENCY)
+        
+        def _cache_key(day: date) -> tuple:
+            return (origin.upper(), destination.upper(), day, cabin_class, 1)
+        
+        clients: Dict[Optional[str], httpx.AsyncClient] = {}
+        
+        async def _search_one(day: date) -> List[FlightAvailability]:
+            cached = self._get_cached_results(_cache_key(day))
+            if cached is not None:
+                return cached
+            async with semaphore:
+                results = await self._search_via_api(
+                    origin, destination, day, cabin_class, 1, clients
+                )
             if results:
-                return results
-        except Exception as e:
-            logger.warning(f"API method failed: {e}")
+                self._cache_results(_cache_key(day), results)
+            return results
         
-        # Fall back to browser scraping
-        logger.info("API method failed, falling back to browser scraping")
         try:
-            results = await self._search_via_browser(
-                origin, destination, departure_date, cabin_class, passengers
+            api_results = await asyncio.gather(
+                *(_search_one(day) for day in dates),
+                return_exceptions=True
             )
-            return results
+        finally:
+            await self._close_http_clients(clients)
+        
+        results = []
+        missing = []
+        for day, day_results in zip(dates, api_results):
+            if isinstance(day_results, BaseException):
+                logger.debug(f"United API failed for {day}: {day_results}")
+                missing.append(day)
+            elif day_results:
+                results.extend(day_results)
+            else:
+                missing.append(day)
+        
+        logger.info(
+            f"United API covered {len(dates) - len(missing)}/{len(dates)} dates "
+            f"for {origin} → {destination}"
+        )
+        
+        for day in missing:
+            try:
+                day_results = await self._search_via_browser(
+                    origin, destination, day, cabin_class, 1
+                )
+                self._cache_results(_cache_key(day), day_results)
+                results.extend(day_results)
+            except Exception as e:
+                logger.error(f"Error searching {day}: {e}")
+            await self._rate_limit_delay()
+        
+        return results
+    
+    async def _api_task_results(self, task: "asyncio.Task") -> List[FlightAvailability]:
+        """Results of an API search task, or [] if it failed"""
+        try:
+            return await task
+        except Exception as e:
+            logger.warning(f"API method failed: {e}")
+            return []
+    
+    async def _browser_task_results(self, task: "asyncio.Task") -> List[FlightAvailability]:
+        """Results of a browser search task; block errors propagate"""
+        try:
+            return await task
         except CaptchaError:
             logger.error("CAPTCHA encountered - aborting")
             raise
@@ -190,19 +449,96 @@ class UnitedMileagePlusScraper(BaseScraper):
             logger.error(f"Browser scraping failed: {e}")
             return []
     
+    # ============== Result Cache ==============
+    
+    # Recent results keyed by (origin, destination, date, cabin, passengers),
+    # shared by all instances; least recently used entries are evicted first
+    RESULT_CACHE_SIZE = 512
+    # Empty results are kept briefly so dead routes aren't hammered
+    EMPTY_RESULT_TTL_SECS = 60
+    _result_cache = ResultCache(RESULT_CACHE_SIZE)
+    
+    @staticmethod
+    def _derive_cache_ttl(departure_date: date) -> int:
+        """Seconds to keep results; near-term award space moves fastest"""
+        days_out = (departure_date - date.today()).days
+        if days_out <= 1:
+            return 600
+        if days_out <= 7:
+            return 1800
+        return 7200
+    
+    @classmethod
+    def _get_cached_results(cls, key: tuple) -> Optional[List[FlightAvailability]]:
+        """Return a copy of unexpired cached results for key, if any"""
+        cache = cls._result_cache
+        results = cache.get(key)
+        outcome = "miss" if results is None else "hit"
+        logger.debug(f"United cache {outcome} ({cache.hits} hits / {cache.misses} misses)")
+        return results
+    
+    @classmethod
+    def _cache_results(cls, key: tuple, results: List[FlightAvailability]) -> None:
+        """Store results for key, evicting the least recently used entries"""
+        ttl = cls._derive_cache_ttl(key[2]) if results else cls.EMPTY_RESULT_TTL_SECS
+        cls._result_cache.put(key, results, ttl)
+    
     # ============== API Method ==============
     
+    # API clients live for one search call (pooled connections belong to the
+    # event loop that opened them, and the API runs each scrape on its own
+    # loop). httpx fixes the proxy per client, so a call keeps one client
+    # per proxy URL (None for direct connections).
+    
+    @staticmethod
+    def _get_http_client(
+        clients: Dict[Optional[str], "httpx.AsyncClient"],
+        proxy_url: Optional[str] = None
+    ) -> "httpx.AsyncClient":
+        """Return the call's API client for proxy_url, creating it on first use"""
+        client = clients.get(proxy_url)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=30,
+                follow_redirects=True,
+                verify=False,
+                proxy=proxy_url,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            clients[proxy_url] = client
+        return client
+    
+    @staticmethod
+    async def _close_http_clients(clients: Dict[Optional[str], "httpx.AsyncClient"]) -> None:
+        """Close every API client opened for a call"""
+        for client in clients.values():
+            await client.aclose()
+        clients.clear()
+    
     async def _search_via_api(
         self,
         origin: str,
         destination: str,
         departure_date: date,
         cabin_class: Optional[CabinClass],
-        passengers: int
+        passengers: int,
+        clients: Optional[Dict[Optional[str], "httpx.AsyncClient"]] = None
     ) -> List[FlightAvailability]:
-        """Search using United's API (less detectable but may be blocked)"""
+        """
+        Search using United's API (less detectable but may be blocked).
         
-        search_url = f"{self.base_url}/api/flight/FetchFlights"
+        Uses clients when given (search_date_range shares them across its
+        dates); otherwise opens and closes clients for this search.
+        """
+        if clients is None:
+            clients = {}
+            try:
+                return await self._search_via_api(
+                    origin, destination, departure_date, cabin_class, passengers, clients
+                )
+            finally:
+                await self._close_http_clients(clients)
         
         payload = {
             "Trips": [{
@@ -224,13 +560,7 @@ class UnitedMileagePlusScraper(BaseScraper):
             "SearchType": "Award",
         }
         
-        headers = self.get_headers()
-        headers.update({
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"{self.base_url}/en/us/book-flight/find-flights",
-        })
+        headers = {**self.get_headers(), **_API_HEADERS}
         
         # Get proxy if available
         proxy_config = None
@@ -241,32 +571,47 @@ class UnitedMileagePlusScraper(BaseScraper):
             )
         
         try:
-            client_kwargs = {
-                "timeout": 30,
-                "follow_redirects": True,
-                "verify": False,
-            }
+            proxy_url = None
             if proxy_config:
-                client_kwargs["proxy"] = proxy_config.to_httpx_proxy()
+                proxy_url = proxy_config.to_httpx_proxy()
                 self._current_proxy_id = proxy_config.id
             
-            async with httpx.AsyncClient(**client_kwargs) as client:
-                response = await client.post(
-                    search_url,
-                    json=payload,
-                    headers=headers
-                )
-                
-                # Check for errors
-                self.check_http_status(response.status_code)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return self._parse_api_response(data, origin, destination, departure_date)
-                else:
-                    logger.warning(f"United API returned {response.status_code}")
-                    return []
-                    
+            # Content-Type is already set above, so orjson's bytes go out as-is
+            body = {"content": orjson.dumps(payload)} if HAS_ORJSON else {"json": payload}
+            
+            client = self._get_http_client(clients, proxy_url)
+            
+            # With ijson, trips are parsed as their bytes arrive instead of
+            # after the whole (possibly multi-MB) body is buffered and decoded
+            if HAS_IJSON:
+                async with client.stream(
+                    "POST", _API_SEARCH_URL, headers=headers, **body
+                ) as response:
+                    self.check_http_status(response.status_code)
+                    if response.status_code != 200:
+                        logger.warning(f"United API returned {response.status_code}")
+                        return []
+                    return await self._stream_api_response(
+                        response, origin, destination, departure_date
+                    )
+            
+            response = await client.post(
+                _API_SEARCH_URL,
+                headers=headers,
+                **body
+            )
+            
+            # Check for errors
+            self.check_http_status(response.status_code)
+            
+            if response.status_code == 200:
+                # orjson decodes the raw bytes directly, skipping text decoding
+                data = orjson.loads(response.content) if HAS_ORJSON else response.json()
+                return self._parse_api_response(data, origin, destination, departure_date)
+            else:
+                logger.warning(f"United API returned {response.status_code}")
+                return []
+            
         except (RateLimitError, BlockedError):
             raise
         except Exception as e:
@@ -282,65 +627,103 @@ class UnitedMileagePlusScraper(BaseScraper):
     ) -> List[FlightAvailability]:
         """Parse API JSON response"""
         flights = []
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
         
         try:
-            trip_data = data.get("data", {}).get("Trips", [])
-            if not trip_data:
-                return []
-            
-            for trip in trip_data:
-                for flight_option in trip.get("Flights", []):
-                    for product in flight_option.get("Products", []):
-                        if not product.get("AwardAvailable"):
-                            continue
-                        
-                        try:
-                            # Parse cabin class
-                            cabin_str = product.get("CabinType", "").lower()
-                            cabin = self._map_cabin_class(cabin_str)
-                            
-                            # Parse times
-                            dep_time = flight_option.get("DepartDateTime", "")
-                            arr_time = flight_option.get("ArrivalDateTime", "")
-                            
-                            # Parse duration
-                            duration = flight_option.get("TravelMinutes", 0)
-                            
-                            # Generate ID
-                            flight_num = flight_option.get("FlightNumber", "")
-                            flight_id = self._generate_flight_id(
-                                flight_num, departure_date, cabin.value
-                            )
-                            
-                            flight = FlightAvailability(
-                                id=flight_id,
-                                source_program=self.program_name,
-                                origin=origin.upper(),
-                                destination=destination.upper(),
-                                airline="United Airlines",
-                                flight_number=f"UA{flight_num}",
-                                departure_date=departure_date,
-                                departure_time=self._format_time(dep_time),
-                                arrival_time=self._format_time(arr_time),
-                                duration_minutes=duration,
-                                cabin_class=cabin,
-                                points_required=product.get("Miles", 0),
-                                taxes_fees=product.get("TaxAndFees", {}).get("Amount", 0),
-                                seats_available=product.get("BookingCount", 0),
-                                stops=flight_option.get("StopCount", 0),
-                            )
-                            flights.append(flight)
-                            
-                        except Exception as e:
-                            logger.debug(f"Error parsing flight: {e}")
-                            continue
-            
+            for trip in data.get("data", {}).get("Trips", []):
+                flights.extend(self._parse_api_trip(
+                    trip, origin.upper(), destination.upper(), departure_date, scraped_at
+                ))
+        except Exception as e:
+            logger.error(f"Error parsing API response: {e}")
+        
+        logger.info(f"Parsed {len(flights)} flights from United API")
+        return flights
+    
+    async def _stream_api_response(
+        self,
+        response: "httpx.Response",
+        origin: str,
+        destination: str,
+        departure_date: date
+    ) -> List[FlightAvailability]:
+        """Parse an API response trip by trip while it is still downloading"""
+        flights = []
+        scraped_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        trips = ijson.items_async(
+            _AsyncByteReader(response.aiter_bytes()), "data.Trips.item", use_float=True
+        )
+        
+        try:
+            async for trip in trips:
+                flights.extend(self._parse_api_trip(
+                    trip, origin.upper(), destination.upper(), departure_date, scraped_at
+                ))
         except Exception as e:
             logger.error(f"Error parsing API response: {e}")
         
         logger.info(f"Parsed {len(flights)} flights from United API")
         return flights
     
+    def _parse_api_trip(
+        self,
+        trip: Dict[str, Any],
+        origin: str,
+        destination: str,
+        departure_date: date,
+        scraped_at: datetime
+    ) -> Iterator[FlightAvailability]:
+        """Yield award flights for one trip of an API response"""
+        for flight_option in trip.get("Flights", []):
+            award_products = [
+                product for product in flight_option.get("Products", [])
+                if product.get("AwardAvailable")
+            ]
+            if not award_products:
+                continue
+            
+            try:
+                # Fields shared by every cabin of this flight are
+                # parsed once, not per product
+                flight_num = flight_option.get("FlightNumber", "")
+                flight_number = f"UA{flight_num}"
+                departure_time = self._format_time(flight_option.get("DepartDateTime", ""))
+                arrival_time = self._format_time(flight_option.get("ArrivalDateTime", ""))
+                duration = flight_option.get("TravelMinutes", 0)
+                stops = flight_option.get("StopCount", 0)
+            except Exception as e:
+                logger.debug(f"Error parsing flight: {e}")
+                continue
+            
+            for product in award_products:
+                try:
+                    # Parse cabin class
+                    cabin = self._map_cabin_class(product.get("CabinType", ""))
+                    
+                    flight = FlightAvailability(
+                        id=self._generate_flight_id(flight_num, departure_date, cabin.value),
+                        source_program=self.program_name,
+                        origin=origin,
+                        destination=destination,
+                        airline="United Airlines",
+                        flight_number=flight_number,
+                        departure_date=departure_date,
+                        departure_time=departure_time,
+                        arrival_time=arrival_time,
+                        duration_minutes=duration,
+                        cabin_class=cabin,
+                        points_required=product.get("Miles", 0),
+                        taxes_fees=product.get("TaxAndFees", {}).get("Amount", 0),
+                        seats_available=product.get("BookingCount", 0),
+                        stops=stops,
+                        scraped_at=scraped_at,
+                    )
+                except Exception as e:
+                    logger.debug(f"Error parsing flight: {e}")
+                    continue
+                
+                yield flight
+    
     # ============== Browser Method ==============
     
     async def _search_via_browser(
@@ -372,63 +755,98 @@ class UnitedMileagePlusScraper(BaseScraper):
             proxy=proxy_config
         )
         
+        # Selenium and the human_* helpers block (time.sleep, polling waits),
+        # so the whole session runs in a worker thread and the API search
+        # racing it in _search_hedged keeps making progress on the loop.
+        # A thread can't be interrupted; on cancellation the session stops
+        # at its next step and closes the browser.
+        cancelled = threading.Event()
         try:
-            async with browser.get_driver() as driver:
-                # Navigate to search page
-                search_url = f"{self.base_url}/en/us/book-flight/find-flights"
-                
-                if not await browser.navigate(search_url):
-                    raise Exception("Failed to load search page")
-                
-                # Check for CAPTCHA immediately
-                if browser.detect_captcha():
-                    raise CaptchaError("CAPTCHA detected on page load")
-                
-                # Check for block
-                if browser.detect_block_page():
-                    raise BlockedError("Blocked on page load")
-                
-                # Random initial scroll
-                browser.human_scroll(random.randint(50, 150))
-                
-                # Enable award travel
-                await self._enable_award_travel(browser)
-                
-                # Fill origin
-                await self._fill_airport(browser, "origin", origin)
-                
-                # Fill destination
-                await self._fill_airport(browser, "destination", destination)
-                
-                # Set date
-                await self._set_date(browser, departure_date)
-                
-                # Click search
-                await self._click_search(browser)
-                
-                # Wait for results
-                await self._wait_for_results(browser)
-                
-                # Check for CAPTCHA after search
-                if browser.detect_captcha():
-                    raise CaptchaError("CAPTCHA detected after search")
-                
-                # Parse results
-                html = browser.get_page_source()
-                return self._parse_html_response(html, origin, destination, departure_date)
-                
+            return await asyncio.to_thread(
+                self._run_browser_search, browser, cancelled, origin, destination, departure_date
+            )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    def _run_browser_search(
+        self,
+        browser: BrowserManager,
+        cancelled: threading.Event,
+        origin: str,
+        destination: str,
+        departure_date: date
+    ) -> List[FlightAvailability]:
+        """Drive one blocking Selenium search session (runs in a worker thread)"""
+        
+        def checkpoint() -> None:
+            if cancelled.is_set():
+                raise asyncio.CancelledError()
+        
+        try:
+            browser.create_driver()
+            
+            # Navigate to search page
+            browser.driver.get(_SEARCH_PAGE_URL)
+            browser.human_sleep(500, 1500)
+            
+            # Check for CAPTCHA immediately
+            if browser.detect_captcha():
+                raise CaptchaError("CAPTCHA detected on page load")
+            
+            # Check for block
+            if browser.detect_block_page():
+                raise BlockedError("Blocked on page load")
+            
+            # Random initial scroll
+            browser.human_scroll(random.randint(50, 150))
+            
+            # Enable award travel
+            checkpoint()
+            self._enable_award_travel(browser)
+            
+            # Fill origin
+            checkpoint()
+            self._fill_airport(browser, "origin", origin)
+            
+            # Fill destination
+            checkpoint()
+            self._fill_airport(browser, "destination", destination)
+            
+            # Set date
+            checkpoint()
+            self._set_date(browser, departure_date)
+            
+            # Click search
+            checkpoint()
+            self._click_search(browser)
+            
+            # Wait for results
+            self._wait_for_results(browser)
+            
+            # Check for CAPTCHA after search
+            if browser.detect_captcha():
+                raise CaptchaError("CAPTCHA detected after search")
+            
+            # Parse results
+            checkpoint()
+            html = browser.get_page_source()
+            return self._parse_html_response(html, origin, destination, departure_date)
+            
         except (CaptchaError, BlockedError):
             raise
         except Exception as e:
             logger.error(f"United browser scraping failed: {e}")
-            # Take screenshot for debugging
+            # Take screenshot for debugging (before the driver is closed)
             try:
                 browser.take_screenshot(f"logs/united_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
             except:
                 pass
             return []
+        finally:
+            browser.close()
     
-    async def _enable_award_travel(self, browser: BrowserManager) -> None:
+    def _enable_award_travel(self, browser: BrowserManager) -> None:
         """Enable award travel toggle"""
         element = browser.find_element_with_fallbacks(
             self._get_award_toggle_locators(),
@@ -439,12 +857,12 @@ class UnitedMileagePlusScraper(BaseScraper):
         if element:
             try:
                 if not element.is_selected():
-                    browser.human_click(browser.driver, element)
+                    browser.human_click(element)
                     browser.human_sleep(300, 600)
             except Exception as e:
                 logger.debug(f"Award toggle interaction failed: {e}")
     
-    async def _fill_airport(self, browser: BrowserManager, field_type: str, code: str) -> None:
+    def _fill_airport(self, browser: BrowserManager, field_type: str, code: str) -> None:
         """Fill airport input with human-like typing"""
         locators = (
             self._get_origin_input_locators() 
@@ -459,7 +877,7 @@ class UnitedMileagePlusScraper(BaseScraper):
         )
         
         if element:
-            browser.human_click(browser.driver, element)
+            browser.human_click(element)
             browser.human_sleep(200, 400)
             browser.human_type(element, code.upper())
             browser.human_sleep(500, 1000)
@@ -468,7 +886,7 @@ class UnitedMileagePlusScraper(BaseScraper):
             element.send_keys(Keys.ENTER)
             browser.human_sleep(300, 600)
     
-    async def _set_date(self, browser: BrowserManager, departure_date: date) -> None:
+    def _set_date(self, browser: BrowserManager, departure_date: date) -> None:
         """Set departure date"""
         element = browser.find_element_with_fallbacks(
             self._get_date_input_locators(),
@@ -477,7 +895,7 @@ class UnitedMileagePlusScraper(BaseScraper):
         )
         
         if element:
-            browser.human_click(browser.driver, element)
+            browser.human_click(element)
             browser.human_sleep(300, 600)
             
             # Try to input date directly or use date picker
@@ -492,7 +910,7 @@ class UnitedMileagePlusScraper(BaseScraper):
             
             browser.human_sleep(300, 600)
     
-    async def _click_search(self, browser: BrowserManager) -> None:
+    def _click_search(self, browser: BrowserManager) -> None:
         """Click search button"""
         element = browser.find_element_with_fallbacks(
             self._get_search_button_locators(),
@@ -503,9 +921,9 @@ class UnitedMileagePlusScraper(BaseScraper):
         if element:
             browser.human_scroll(random.randint(100, 200))
             browser.human_sleep(200, 500)
-            browser.human_click(browser.driver, element)
+            browser.human_click(element)
     
-    async def _wait_for_results(self, browser: BrowserManager) -> None:
+    def _wait_for_results(self, browser: BrowserManager) -> None:
         """Wait for flight results to load"""
         element = browser.wait_for_any_element(
             self._get_flight_results_locators(),
@@ -527,22 +945,14 @@ class UnitedMileagePlusScraper(BaseScraper):
     ) -> List[FlightAvailability]:
         """Parse HTML response from browser"""
         flights = []
-        soup = BeautifulSoup(html, "lxml")
+        root = lxml.html.fromstring(html)
         
         # Try multiple selectors for flight cards
-        flight_card_selectors = [
-            "[data-testid='flight-card']",
-            ".flight-result-card",
-            "[class*='FlightCard']",
-            ".flight-row",
-            "[class*='flightResult']",
-        ]
-        
         flight_cards = []
-        for selector in flight_card_selectors:
-            flight_cards = soup.select(selector)
+        for selector in _FLIGHT_CARD_SELECTORS:
+            flight_cards = selector(root)
             if flight_cards:
-                logger.debug(f"Found {len(flight_cards)} flight cards with {selector}")
+                logger.debug(f"Found {len(flight_cards)} flight cards with {selector.css}")
                 break
         
         for card in flight_cards:
@@ -559,7 +969,7 @@ class UnitedMileagePlusScraper(BaseScraper):
     
     def _parse_flight_card(
         self,
-        card,
+        card: lxml.html.HtmlElement,
         origin: str,
         destination: str,
         departure_date: date
@@ -567,44 +977,18 @@ class UnitedMileagePlusScraper(BaseScraper):
         """Parse a single flight card"""
         try:
             # Extract flight number
-            flight_num_selectors = [
-                "[data-testid='flight-number']",
-                ".flight-number",
-                "[class*='flightNumber']",
-            ]
-            flight_number = self._extract_text(card, flight_num_selectors) or "UA"
+            flight_number = self._extract_text(card, _FLIGHT_NUM_SELECTORS) or "UA"
             
             # Extract times
-            dep_time_selectors = [
-                "[data-testid='departure-time']",
-                ".departure-time",
-                "[class*='departTime']",
-            ]
-            arr_time_selectors = [
-                "[data-testid='arrival-time']",
-                ".arrival-time", 
-                "[class*='arrivalTime']",
-            ]
-            
-            dep_time = self._extract_text(card, dep_time_selectors) or "00:00"
-            arr_time = self._extract_text(card, arr_time_selectors) or "00:00"
+            dep_time = self._extract_text(card, _DEP_TIME_SELECTORS) or "00:00"
+            arr_time = self._extract_text(card, _ARR_TIME_SELECTORS) or "00:00"
             
             # Extract miles
-            miles_selectors = [
-                "[data-testid='miles-cost']",
-                ".miles-cost",
-                "[class*='miles']",
-            ]
-            miles_text = self._extract_text(card, miles_selectors) or "0"
+            miles_text = self._extract_text(card, _MILES_SELECTORS) or "0"
             miles = self._parse_miles(miles_text)
             
             # Extract cabin
-            cabin_selectors = [
-                "[data-testid='cabin-class']",
-                ".cabin-class",
-                "[class*='cabin']",
-            ]
-            cabin_text = self._extract_text(card, cabin_selectors) or "economy"
+            cabin_text = self._extract_text(card, _CABIN_SELECTORS) or "economy"
             cabin = self._map_cabin_class(cabin_text)
             
             # Generate ID
@@ -634,19 +1018,18 @@ class UnitedMileagePlusScraper(BaseScraper):
     
     # ============== Helper Methods ==============
     
-    def _extract_text(self, element, selectors: List[str]) -> Optional[str]:
+    def _extract_text(self, element, xpaths: Tuple[etree.XPath, ...]) -> Optional[str]:
         """Extract text using multiple fallback selectors"""
-        for selector in selectors:
-            try:
-                found = element.select_one(selector)
-                if found:
-                    return found.get_text(strip=True)
-            except Exception:
-                continue
+        for xpath in xpaths:
+            found = xpath(element)
+            if found:
+                return _element_text(found[0])
         return None
     
-    def _map_cabin_class(self, cabin_str: str) -> CabinClass:
-        """Map cabin string to CabinClass enum"""
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _map_cabin_class(cabin_str: str) -> CabinClass:
+        """Map cabin string to CabinClass enum (labels repeat on every flight)"""
         cabin_lower = cabin_str.lower()
         if "first" in cabin_lower:
             return CabinClass.FIRST
@@ -659,6 +1042,10 @@ class UnitedMileagePlusScraper(BaseScraper):
     def _format_time(self, time_str: str) -> str:
         """Format time string to HH:MM"""
         try:
+            # ISO timestamps ("2024-05-01T07:45:00-05:00") already carry
+            # the local wall-clock time at a fixed offset
+            if len(time_str) >= 16 and time_str[10] == "T" and time_str[13] == ":":
+                return time_str[11:16]
             if "T" in time_str:
                 dt = datetime.fromisoformat(time_str.replace("Z", "+00:00"))
                 return dt.strftime("%H:%M")
@@ -673,13 +1060,8 @@ class UnitedMileagePlusScraper(BaseScraper):
             time_str = time_str.upper().replace("AM", "").replace("PM", "").strip()
             
             # Handle various formats
-            patterns = [
-                r"(\d{1,2}):(\d{2})",
-                r"(\d{1,2})(\d{2})",
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, time_str)
+            for pattern in _TIME_PATTERNS:
+                match = pattern.search(time_str)
                 if match:
                     hour, minute = match.groups()
                     return f"{int(hour):02d}:{minute}"
@@ -692,7 +1074,7 @@ class UnitedMileagePlusScraper(BaseScraper):
         """Parse miles from text"""
         try:
             # Remove commas, 'K', 'miles', etc.
-            cleaned = re.sub(r"[^\d]", "", miles_text)
+            cleaned = _NON_DIGIT_PATTERN.sub("", miles_text)
             if cleaned:
                 miles = int(cleaned)
                 # Handle 'K' notation